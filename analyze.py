@@ -1,8 +1,6 @@
-import os
-
 from tqdm import tqdm
 
-from utility import reader_json, write_output
+from utility import write_output, list_directory, load_files
 
 def analyze():
     """
@@ -28,9 +26,8 @@ def analyze():
     list_files_list_basis = []
     list_files_list_wo_basis = []
 
-    for doc in tqdm(os.listdir(path_dir_dataset), desc = "Processing orginal dataset with key word"): # care 2 cases without 2000~2025
-        file_path = os.path.join(path_dir_dataset, doc)
-        data = reader_json(file_path)
+    list_path = [path for _, path in list_directory(path_dir_dataset, suffix = None)]
+    for data in tqdm(load_files(list_path), total = len(list_path), desc = "Processing orginal dataset with key word"): # care 2 cases without 2000~2025
         text_raw_jfull = data["JFULL"]
         jid = data["JID"]
         if key_word_retire in text_raw_jfull:
@@ -1,11 +1,14 @@
 import os
 import re
+import sys
 import json
 import time
+import argparse
 import urllib.parse
+from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from utility import reader_txt, reader_json, write_output, get_html, get_query, get_content, get_head
+from utility import reader_txt, reader_json, write_output, write_history, Writer, HistoryWriter, get_html, get_query, get_content, get_head, parse_jid, Throttle
 
 from tqdm import tqdm
 from bs4 import BeautifulSoup
@@ -46,42 +49,46 @@ def get_dict_history(case: dict) -> dict:
         "link2web": link2web
     }
 
+PATTERN_LAW_NAME = re.compile(r"(?P<law>.+?)(?=\s*第)")
+PATTERN_LAW_NO = re.compile(r"(?<=第)\s*(?P<arts>.+?)\s*(?=條)")
+PATTERN_LAW_TIME = re.compile(r"([（(](?P<date>[0-9０-９]{2,3}\.\d{1,2}\.\d{1,2})[）)])")
+TABLE_FULL_WIDTH_DIGIT = str.maketrans("０１２３４５６７８９．", "0123456789.")
+
+@lru_cache(maxsize = 4096)
+def parse_law(text: str) -> tuple:
+    """
+    parse a related law citation, memoized by text since the same few hundred citations repeat across judgments.
+    law names are interned, so repeated names share one string object.
+    args:
+        -text: str, e.g., "勞動基準法 第 55 條(109.06.10)"
+    returns:
+        -(law_name, law_no, law_time): tuple, article numbers with full-width digits normalized.
+    """
+    match_name = PATTERN_LAW_NAME.search(text)
+    match_no = PATTERN_LAW_NO.search(text)
+    match_time = PATTERN_LAW_TIME.search(text)
+    name = sys.intern(match_name.group("law")) if match_name else None
+    no = match_no.group("arts").translate(TABLE_FULL_WIDTH_DIGIT) if match_no else None
+    time = match_time.group("date") if match_time else None
+    ### check region, printed once per distinct text
+    if not name:
+        print(f"Warning: no law name found. text: {text}")
+    if name and not no:
+        print(f"Warning: law name found but no article number. text: {text}")
+    if no and not name:
+        print(f"Warning: article number found but no law name. text: {text}")
+    ### check region
+    return name, no, time
+
 def get_dict_law(case: dict) -> dict:
 
-    pattern_name = re.compile(r"(?P<law>.+?)(?=\s*第)")
-    pattern_no = re.compile(r"(?<=第)\s*(?P<arts>.+?)\s*(?=條)")
-    pattern_time = re.compile(r"([（(](?P<date>[0-9０-９]{2,3}\.\d{1,2}\.\d{1,2})[）)])")
-    pointer_null = False
     law_name = None
     law_no = None
     law_time = None
 
     text = case["desc"]
-    if not text:
-        pointer_null = True
-    else:
-        match_name = pattern_name.search(text)
-        match_no = pattern_no.search(text)
-        match_time = pattern_time.search(text)
-        name = match_name.group("law") if match_name else None
-        no = match_no.group("arts") if match_no else None
-        time = match_time.group("date") if match_time else None
-        ### check region
-        if not name:
-            print(f"Warning: no law name found. text: {text}")
-        if name and not no:
-            print(f"Warning: law name found but no article number. text: {text}")
-        if no and not name:
-            print(f"Warning: article number found but no law name. text: {text}")
-        ### check region
-    if pointer_null:
-        law_name = None
-        law_no = None
-        law_time = None
-    else:
-        law_name = name
-        law_no = no
-        law_time = time
+    if text:
+        law_name, law_no, law_time = parse_law(text)
 
     return {
         "law_name": law_name,
@@ -227,31 +234,90 @@ def fliter_new_jid(file: str) -> int:
             return 2
     return 0
 
-def extend_history(list_history_original: list, set_original_jid: set) -> list:
+def fetch_history(list_jid: list, max_workers: int = 10) -> list:
+    """
+    request the history of each JID concurrently, requests are throttled in the workers.
+    a failed request stops the crawl, the pending requests are cancelled, so a level is never written with missing histories
+    (see classify_history_jid of link.py).
+    args:
+        -list_jid: list, JIDs to request.
+        -max_workers: int, number of threads.
+    returns:
+        -list_history: list, dicts with keys JID and history, in the order of list_jid.
+    """
+    dict_history = {}
+    throttle = Throttle()
+
+    def request(jid: str) -> list:
+        throttle.wait()
+        return find_history(jid)
+
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        futures = {executor.submit(request, jid): jid for jid in list_jid}
+        for future in tqdm(as_completed(futures), total = len(futures), desc = "Processing history"):
+            jid = futures[future]
+            try:
+                dict_history[jid] = future.result()
+            except Exception:
+                print(f"Error processing {jid}, stopping")
+                for future_pending in futures:
+                    future_pending.cancel()
+                raise
+    return [{"JID": jid, "history": dict_history[jid]} for jid in list_jid]
+
+def extend_history(list_history_original: list, set_original_jid: set, depth: int = 1, output_path: str = None, max_workers: int = 10) -> list:
     """
     Extend the history of cases by checking if the JID in history is already in the original set.
+    breadth-first over the appeal histories, level 1 is the JIDs found in the histories of the original cases,
+    level k + 1 is the JIDs found in the histories of level k, which are requested from the judicial website,
+    so rulings only listed in the history of a later judgment, e.g., after a remand, are also collected.
     args:
         -list_history_original: list, a list of dictionaries containing history information.
-        -set_original_jid: set, a set of original JIDs to check against.
+        -set_original_jid: set, a set of original JIDs to check against, updated with the new JIDs as the visited set.
+        -depth: int, number of levels to extend, 1 only uses the histories of the original cases.
+        -output_path: str, normalized jsonl file (see utility.history) the new records are appended to level by level, None to keep them in memory only.
+        -max_workers: int, number of threads to request the histories of a level.
     returns:
         -list_new_history: list, a list of dictionaries with new JIDs and their history.
     """
     list_new_history = []
-
-    for item in tqdm(list_history_original, desc = "Extending history"):
-        jid = item["JID"]
-        history = item["history"]
-        if not history: # size of empty = 154
-            continue
-        for judgment in history:
-            hist_jid = judgment.get("link2json", None)
-            if hist_jid and (hist_jid not in set_original_jid):
-                dict_temp = {
-                    "JID": hist_jid,
-                    "history": history,
-                }
-                list_new_history.append(dict_temp)
-                set_original_jid.add(hist_jid)
+    list_frontier = list_history_original
+
+    writer = Writer(output_path, policy = "overwrite").open() if output_path else None # committed when complete, so an interrupted run leaves no partial file
+    history_writer = HistoryWriter(writer.file) if writer else None # records of a level share the history they were found in
+
+    try:
+        for level in range(1, depth + 1):
+            list_level = []
+            for item in tqdm(list_frontier, desc = f"Extending history (level {level})"):
+                history = item["history"]
+                if not history: # size of empty = 154
+                    continue
+                for judgment in history:
+                    hist_jid = judgment.get("link2json", None)
+                    if hist_jid and (hist_jid not in set_original_jid):
+                        dict_temp = {
+                            "JID": hist_jid,
+                            "history": history,
+                        }
+                        list_level.append(dict_temp)
+                        set_original_jid.add(hist_jid)
+            if history_writer:
+                for item in list_level:
+                    history_writer.write(item)
+                writer.file.flush()
+            list_new_history.extend(list_level)
+            print(f"Level {level}: {len(list_level)} new JIDs")
+
+            if level == depth or not list_level:
+                break
+            list_frontier = fetch_history([item["JID"] for item in list_level], max_workers)
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+    if writer:
+        writer.close()
 
     return list_new_history
 
@@ -266,6 +332,15 @@ def appeal():
     5. dataset size description
     """
 
+    parser = argparse.ArgumentParser(description = "Collecting the appeal histories of judgments")
+
+    parser.add_argument('--depth', type = int, default = 1, help = 'Levels of history to follow from the original cases (default: 1)')
+
+    args = parser.parse_args()
+
+    if args.depth < 1:
+        raise ValueError(f"depth must be at least 1, got {args.depth}")
+
     ### parameters for step 1.
     files_list_judgment = f'./logs/filtering/files_list_judgment.txt'
     files_list_no_judgment_SV = f'./logs/filtering/files_list_no_judgment_SV.txt'
@@ -274,6 +349,8 @@ def appeal():
 
     ### parameters for step 2.
     output_path_new_history = f'./logs/appealing/new_history.txt'
+    output_path_new_history_records = f'./appeal/new_history.jsonl'
+    depth_history = args.depth
     ### parameters for step 2.
 
     ### parameters for step 3.
@@ -351,7 +428,7 @@ def appeal():
                 "related_law": list_law
             }
             list_output.append(dict_temp)
-        write_output(list_output, output_path_link)
+        write_history(list_output, output_path_link)
 
     """
     step 2. extend dataset from history
@@ -361,7 +438,7 @@ def appeal():
     
     list_history_original = reader_json(path_link)
 
-    list_new_history = extend_history(list_history_original, set_original_jid)
+    list_new_history = extend_history(list_history_original, set_original_jid, depth_history, output_path_new_history_records, MAX_WORKERS) # rerun decided by pipeline.py
     list_file_new_history = [item["JID"] for item in list_new_history]
     write_output(list_file_new_history, output_path_new_history)
 
@@ -369,45 +446,46 @@ def appeal():
     step 3. filtering out cases based on value of "int_case", which is returned by fliter_new_jid function
     """
     count_case = 0
-    list_new_history_cleaned = []
-    list_file_new_history_cleaned = []
     list_file_new_history_secret = []
     list_file_new_history_no_judgment = []
     list_file_new_history_invalid = []
 
     if not os.path.exists(output_path_new_history_cleaned):
-        with ThreadPoolExecutor(max_workers = MAX_WORKERS) as executor:
-            futures = {executor.submit(fliter_new_jid, item["JID"]): item for item in list_new_history}
-            for future in tqdm(as_completed(futures), total = len(futures)):
-                try:
-                    item = futures[future]
-                    int_case = future.result()
-                    if int_case == 0:
-                        counter_retry = 0
-                        list_law, pointer_fail = find_law(item["JID"])
-                        if pointer_fail:
-                            list_law = find_loop(item["JID"])
-                        item["related_law"] = list_law
-                        list_new_history_cleaned.append(item)
-                        list_file_new_history_cleaned.append(item["JID"])
-                    elif int_case == 1:
-                        list_file_new_history_secret.append(item["JID"])
-                    elif int_case == 2:
-                        list_file_new_history_no_judgment.append(item["JID"])
-                    else:
-                        list_file_new_history_invalid.append(item["JID"])
-                    count_case += 1
-                    if count_case % 30 == 0:
-                        time.sleep(2)
-                except Exception as e:
-                    e_jid = item["JID"]
-                    print(f"Error processing {e_jid}: {e}")
-
-        write_output(list_new_history_cleaned, output_path_new_history_cleaned)
-        write_output(list_file_new_history_cleaned, output_path_file_new_history_cleaned)
-        write_output(list_file_new_history_secret, output_path_file_new_history_secret)
-        write_output(list_file_new_history_no_judgment, output_path_file_new_history_no_judgment)
-        write_output(list_file_new_history_invalid, output_path_file_new_history_invalid)
+        # cleaned cases are streamed as they are crawled and committed together at the end, new_history_cleaned.jsonl last,
+        # so an interrupted crawl leaves no partial output and is rerun from the start
+        with Writer(output_path_new_history_cleaned, policy = "overwrite") as writer_cleaned, \
+                Writer(output_path_file_new_history_cleaned, policy = "overwrite") as writer_file_cleaned:
+            history_writer = HistoryWriter(writer_cleaned.file)
+            with ThreadPoolExecutor(max_workers = MAX_WORKERS) as executor:
+                futures = {executor.submit(fliter_new_jid, item["JID"]): item for item in list_new_history}
+                for future in tqdm(as_completed(futures), total = len(futures)):
+                    try:
+                        item = futures[future]
+                        int_case = future.result()
+                        if int_case == 0:
+                            counter_retry = 0
+                            list_law, pointer_fail = find_law(item["JID"])
+                            if pointer_fail:
+                                list_law = find_loop(item["JID"])
+                            item["related_law"] = list_law
+                            history_writer.write(item)
+                            writer_file_cleaned.write(item["JID"])
+                        elif int_case == 1:
+                            list_file_new_history_secret.append(item["JID"])
+                        elif int_case == 2:
+                            list_file_new_history_no_judgment.append(item["JID"])
+                        else:
+                            list_file_new_history_invalid.append(item["JID"])
+                        count_case += 1
+                        if count_case % 30 == 0:
+                            time.sleep(2)
+                    except Exception as e:
+                        e_jid = item["JID"]
+                        print(f"Error processing {e_jid}: {e}")
+
+            write_output(list_file_new_history_secret, output_path_file_new_history_secret, policy = "overwrite")
+            write_output(list_file_new_history_no_judgment, output_path_file_new_history_no_judgment, policy = "overwrite")
+            write_output(list_file_new_history_invalid, output_path_file_new_history_invalid, policy = "overwrite")
     
     """
     step 4. merging all history and sorting then save
@@ -418,12 +496,8 @@ def appeal():
     list_history_cleaned = reader_json(output_path_new_history_cleaned)
     merged_list_history = list_history_original + list_history_cleaned
     for item in merged_list_history:
-        version = item["JID"].split(",")
-        if len(version) > 5:
-            item["version"] = version[5]
-        else:
-            item["version"] = "0"
-    merged_list_history.sort(key = lambda x: (x["JID"].split(",")[4], x["version"]))
+        item["version"] = parse_jid(item["JID"]).version
+    merged_list_history.sort(key = lambda x: parse_jid(x["JID"]).sort_key) # (date, version)
 
     for instance_json in merged_list_history:
         JID = instance_json["JID"]
@@ -436,7 +510,7 @@ def appeal():
             "related_law": related_law
         })
 
-    write_output(list_all_history, output_path_all_links)
+    write_history(list_all_history, output_path_all_links)
     write_output(list_file_all_history, output_path_all_links_file)
 
     """
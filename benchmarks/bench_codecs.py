@@ -0,0 +1,90 @@
+"""
+benchmark the write and read throughput of the codecs of utility.open_text on an intermediate JSONL.
+the read time at a disk bandwidth adds the time to fetch the file from disk to the measured (page cached) decode time.
+usage (from the repository root):
+    python -m benchmarks.bench_codecs
+    python -m benchmarks.bench_codecs --input ./appeal/all_history.jsonl --disk_mbps 100 --output ./bench_codecs.json
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+from utility import Writer, iter_json, reader_json
+
+def time_codec(list_record: list, dir_temp: str, name: str, suffix: str, repeat: int) -> dict:
+    """
+    args:
+        list_record: list, records to write.
+        dir_temp: str, directory of the written files.
+        name: str, name of the input file.
+        suffix: str, "" for plain text, ".gz" or ".xz".
+        repeat: int, repeats of the write and the read, best is reported.
+    returns:
+        result: dict, keys: codec, bytes, write_seconds, read_seconds.
+    """
+    output_path = os.path.join(dir_temp, name + suffix)
+    best_write = None
+    best_read = None
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        with Writer(output_path, policy = "overwrite") as writer:
+            writer.write_all(list_record)
+        seconds = time.perf_counter() - time_start
+        best_write = seconds if best_write is None else min(best_write, seconds)
+
+        time_start = time.perf_counter()
+        for _ in iter_json(output_path):
+            pass
+        seconds = time.perf_counter() - time_start
+        best_read = seconds if best_read is None else min(best_read, seconds)
+    return {
+        "codec": suffix or "plain",
+        "bytes": os.path.getsize(output_path),
+        "write_seconds": best_write,
+        "read_seconds": best_read
+    }
+
+def bench_codecs():
+
+    parser = argparse.ArgumentParser(description = "Benchmark the codecs of the JSONL files")
+
+    parser.add_argument('--input', type = str, default = "./unique/unique_history.jsonl", help = 'JSONL to benchmark (default: "./unique/unique_history.jsonl")')
+    parser.add_argument('--codec', type = str, nargs = '+', default = ["", ".gz", ".xz"], help = 'Suffixes to compare, "" is plain text (default: "" .gz .xz)')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'Repeats per codec, best is reported (default: 3)')
+    parser.add_argument('--disk_mbps', type = float, default = 100.0, help = 'Disk bandwidth in MB/s for the estimated read time (default: 100.0)')
+    parser.add_argument('--output', type = str, default = None, help = 'Write results as json to this file (default: stdout only)')
+
+    args = parser.parse_args()
+
+    list_record = reader_json(args.input)
+    name = os.path.basename(args.input)
+    dir_temp = tempfile.mkdtemp(prefix = "bench_codecs_")
+    try:
+        list_result = [time_codec(list_record, dir_temp, name, suffix, args.repeat) for suffix in args.codec]
+    finally:
+        shutil.rmtree(dir_temp)
+
+    bytes_plain = next((result["bytes"] for result in list_result if result["codec"] == "plain"), list_result[0]["bytes"])
+    for result in list_result:
+        result["ratio"] = result["bytes"] / bytes_plain
+        result["write_mbps"] = bytes_plain / 1e6 / result["write_seconds"]
+        result["read_mbps"] = bytes_plain / 1e6 / result["read_seconds"]
+        result["read_seconds_at_disk"] = result["bytes"] / 1e6 / args.disk_mbps + result["read_seconds"]
+
+    print(f"records: {len(list_record)}, disk: {args.disk_mbps} MB/s")
+    print(f"{'codec':<8}{'MB':>10}{'ratio':>8}{'write MB/s':>12}{'read MB/s':>12}{'read s @ disk':>16}")
+    for result in list_result:
+        print(
+            f"{result['codec']:<8}{result['bytes'] / 1e6:>10.2f}{result['ratio']:>8.3f}{result['write_mbps']:>12.1f}"
+            f"{result['read_mbps']:>12.1f}{result['read_seconds_at_disk']:>16.3f}"
+        )
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            json.dump(list_result, f, indent = 4, ensure_ascii = False)
+    return list_result
+
+if __name__ == "__main__":
+    bench_codecs()
@@ -0,0 +1,109 @@
+"""
+benchmark every compiled pattern of split_defense against adversarial and worst-case sentences.
+usage (from the repository root):
+    python -m benchmarks.bench_patterns
+    python -m benchmarks.bench_patterns --input ./assets/ --top 20 --output ./bench_output.txt
+"""
+import os
+import json
+import time
+import argparse
+
+from extract import dict_pattern_defense, crop_judgment, resplit_judgment_into_numbered_list, Segments
+
+def adversarial_sentences(list_length: list) -> dict:
+    """
+    long unpunctuated sentences that make the {1,50} classes, the alternations and the lookahead retry at every position.
+    args:
+        list_length: list, lengths of the generated sentences.
+    returns:
+        dict_sentence: dict, name to sentence.
+    """
+    dict_sentence = {}
+    for length in list_length:
+        dict_sentence[f"cjk_no_colon_{length}"] = ("原告主張被告則以" * (length // 8 + 1))[:length]
+        dict_sentence[f"cjk_comma_{length}"] = ("、被上訴人等起訴" * (length // 8 + 1))[:length]
+        dict_sentence[f"brackets_digits_{length}"] = ("（一）０１、，○" * (length // 8 + 1))[:length]
+        dict_sentence[f"dispute_no_issue_{length}"] = ("爭執之" * (length // 3 + 1))[:length - 5] + "不爭執事項"
+    return dict_sentence
+
+def corpus_sentences(path_dir: str, top: int) -> dict:
+    """
+    the longest sentences of the raw judgments in a directory, after crop_judgment and resplit.
+    args:
+        path_dir: str, directory of raw {JID}.json files.
+        top: int, number of sentences to keep.
+    returns:
+        dict_sentence: dict, "{JID}#{index}" to sentence.
+    """
+    list_candidate = []
+    for doc in sorted(os.listdir(path_dir)):
+        if not doc.endswith(".json"):
+            continue
+        with open(os.path.join(path_dir, doc), 'r', encoding = 'utf-8') as f:
+            data = json.load(f)
+        judgment = resplit_judgment_into_numbered_list(crop_judgment(data))
+        for value in judgment.values():
+            if not isinstance(value, Segments):
+                continue
+            for index, span in enumerate(value):
+                list_candidate.append((span.end - span.start, f"{data['JID']}#{index}", span))
+        list_candidate = sorted(list_candidate, key = lambda x: x[0], reverse = True)[:top]
+    return {name: str(span) for _, name, span in list_candidate}
+
+def time_pattern(pattern, sentence: str, repeat: int, timeout: float) -> float:
+    """
+    returns:
+        seconds: float, best of repeat searches, None if a search exceeded timeout.
+    """
+    best = None
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        try:
+            pattern.search(sentence, timeout = timeout)
+        except TimeoutError:
+            return None
+        seconds = time.perf_counter() - time_start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def bench_patterns():
+
+    parser = argparse.ArgumentParser(description = "Benchmark the patterns of split_defense")
+
+    parser.add_argument('--input', type = str, default = None, help = 'Directory of raw json judgments for worst-case sentences (default: adversarial only)')
+    parser.add_argument('--top', type = int, default = 20, help = 'Number of longest corpus sentences (default: 20)')
+    parser.add_argument('--length', type = int, nargs = '+', default = [1000, 10000, 50000], help = 'Lengths of adversarial sentences (default: 1000 10000 50000)')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'Repeats per pattern and sentence, best is reported (default: 3)')
+    parser.add_argument('--timeout', type = float, default = 10.0, help = 'Timeout in seconds of a single search (default: 10.0)')
+    parser.add_argument('--output', type = str, default = None, help = 'Write results as json to this file (default: stdout only)')
+
+    args = parser.parse_args()
+
+    dict_sentence = adversarial_sentences(args.length)
+    if args.input:
+        dict_sentence.update(corpus_sentences(args.input, args.top))
+
+    list_result = []
+    for name_pattern, pattern in dict_pattern_defense.items():
+        for name_sentence, sentence in dict_sentence.items():
+            seconds = time_pattern(pattern, sentence, args.repeat, args.timeout)
+            list_result.append({
+                "pattern": name_pattern,
+                "sentence": name_sentence,
+                "length": len(sentence),
+                "seconds": seconds
+            })
+    list_result.sort(key = lambda x: float("inf") if x["seconds"] is None else x["seconds"], reverse = True)
+
+    print(f"{'pattern':<30}{'sentence':<40}{'length':>10}{'ms':>12}")
+    for result in list_result:
+        ms = "timeout" if result["seconds"] is None else f"{result['seconds'] * 1000:.3f}"
+        print(f"{result['pattern']:<30}{result['sentence'][:39]:<40}{result['length']:>10}{ms:>12}")
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            json.dump(list_result, f, indent = 4, ensure_ascii = False)
+    return list_result
+
+if __name__ == "__main__":
+    bench_patterns()
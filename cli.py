@@ -0,0 +1,43 @@
+import sys
+import importlib
+
+"""
+single entry point of the pipeline, "python cli.py COMMAND [ARGS ...]" runs the stage script of the command with ARGS,
+e.g., "python cli.py query law '勞動基準法:55'" is "python query.py law '勞動基準法:55'".
+the module of a command is imported only when it runs, so --help and the queries do not load the heavy dependencies
+(requests and bs4 of the crawler, rarfile, regex, numpy) of the other stages.
+"""
+COMMANDS = {
+    "filter": ("filter", "filter", "Filtering the judgments of the RAR archives"),
+    "appeal": ("appeal", "appeal", "Collecting the appeal histories of judgments"),
+    "unique": ("unique", "unique", "Filtering by statutory provisions and removing duplicate histories"),
+    "link": ("link", "link", "Linking judgments based on their histories"),
+    "analyze": ("analyze", "analyze", "Analyzing the original dataset with key words"),
+    "extract": ("extract", "extract", "Extracting sections of judgments"),
+    "file_list": ("file_list", "file_list", "Creating the file lists and the original and extracted datasets"),
+    "query": ("query", "query", "Querying the stores built by the pipeline"),
+    "export": ("export", "export", "Exporting the files of a JID subset"),
+    "pipeline": ("pipeline", "pipeline", "Running the pipeline stages whose inputs changed"),
+}
+
+def usage() -> str:
+    width = max(len(command) for command in COMMANDS)
+    lines = ["usage: cli.py COMMAND [ARGS ...]", "", "commands:"]
+    lines += [f"  {command:<{width}}  {description}" for command, (_, _, description) in COMMANDS.items()]
+    lines += ["", "ARGS go to the command, e.g., cli.py query --help"]
+    return "\n".join(lines)
+
+def cli():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(usage())
+        return
+    command = sys.argv[1]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n\n{usage()}", file = sys.stderr)
+        sys.exit(2)
+    module, function, _ = COMMANDS[command]
+    sys.argv = [f"{sys.argv[0]} {command}"] + sys.argv[2:] # argparse of the stage reads its arguments and program name
+    getattr(importlib.import_module(module), function)()
+
+if __name__ == "__main__":
+    cli()
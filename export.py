@@ -0,0 +1,160 @@
+import os
+import sys
+import shutil
+import tarfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+from utility import reader_txt, write_json, list_directory, JidSetStore
+from extract import iter_archive
+
+MAX_WORKERS = 16
+FICLONE = 0x40049409 # ioctl of linux to clone a file on copy-on-write filesystems (btrfs, xfs)
+
+TAR_MODES = {".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz", ".tar.xz": "w:xz"}
+
+def reflink(path_source: str, path_target: str):
+    """
+    clone path_source to path_target sharing the data blocks, raise OSError where not supported.
+    """
+    import fcntl # not on windows, where the OSError below falls back to a copy
+    with open(path_source, 'rb') as f_source, open(path_target, 'wb') as f_target:
+        try:
+            fcntl.ioctl(f_target.fileno(), FICLONE, f_source.fileno())
+        except OSError:
+            f_target.close()
+            os.remove(path_target)
+            raise
+
+def materialize(path_source: str, path_target: str, mode: str = "link") -> str:
+    """
+    place a file of a store in the delivery without reading it where possible, an existing target is kept.
+    a hardlink shares the file with the store, the pipeline replaces files instead of writing into them (see utility.Writer),
+    so the delivery is not changed by later runs, but editing a delivered file in place edits the store too, use mode "copy" then.
+    args:
+        path_source: str, file of a store, e.g., "./assets/TYDV,112,勞訴,1,20230101.json".
+        path_target: str, file of the delivery.
+        mode: str, "link" tries a hardlink, then a reflink, then a copy, "copy" always copies.
+    returns:
+        method: str, "exists", "link", "reflink" or "copy".
+    """
+    if os.path.exists(path_target):
+        return "exists"
+    if mode == "link":
+        try:
+            os.link(path_source, path_target)
+            return "link"
+        except OSError: # other filesystem or no hardlinks
+            pass
+        try:
+            reflink(path_source, path_target)
+            return "reflink"
+        except (OSError, ImportError):
+            pass
+    shutil.copyfile(path_source, path_target)
+    return "copy"
+
+def archive_mode(output_path: str) -> str:
+    """
+    tarfile mode of an archive path, raise ValueError for a suffix other than .tar, .tar.gz (.tgz) or .tar.xz.
+    """
+    mode = next((mode for suffix, mode in TAR_MODES.items() if output_path.endswith(suffix)), None)
+    if mode is None:
+        raise ValueError(f"Unknown archive suffix: {output_path}, expected one of {list(TAR_MODES)}")
+    return mode
+
+def pack(path_dir: str, output_path: str):
+    """
+    pack the delivery directory into one archive, see archive_mode.
+    """
+    with tarfile.open(output_path, archive_mode(output_path)) as tf:
+        tf.add(path_dir, arcname = os.path.basename(os.path.normpath(path_dir)))
+
+def export_subset(list_jid: list, dict_source: dict, output_dir: str, path_dir_dataset: str = None, mode: str = "link") -> dict:
+    """
+    materialize the files of the JIDs from each store into {output_dir}/{name of the store}/.
+    args:
+        list_jid: list, JIDs of the delivery.
+        dict_source: dict, name to directory of a store of {JID}.* files, e.g., {"original": "./assets/"}.
+        output_dir: str, directory of the delivery.
+        path_dir_dataset: str, RAR archives, originals missing from the "original" store are read from them, None to skip.
+        mode: str, see materialize.
+    returns:
+        dict_missing: dict, name of the store to the JIDs without a file.
+    """
+    dict_missing = {}
+    list_task = []
+    for name, path_dir in dict_source.items():
+        output_dir_source = os.path.join(output_dir, name)
+        os.makedirs(output_dir_source, exist_ok = True)
+        list_entry = list_directory(path_dir, list_jid, suffix = None) if os.path.isdir(path_dir) else []
+        for _, path_source in list_entry:
+            list_task.append((path_source, os.path.join(output_dir_source, os.path.basename(path_source))))
+        set_found = {jid for jid, _ in list_entry}
+        dict_missing[name] = sorted(set(list_jid) - set_found)
+
+    dict_count = {}
+    with ThreadPoolExecutor(max_workers = MAX_WORKERS) as executor:
+        futures = [executor.submit(materialize, path_source, path_target, mode) for path_source, path_target in list_task]
+        for future in tqdm(futures, desc = "Exporting files"):
+            method = future.result()
+            dict_count[method] = dict_count.get(method, 0) + 1
+    print(f"Exported files: {dict_count}")
+
+    list_missing_original = dict_missing.get("original", [])
+    if path_dir_dataset and os.path.isdir(path_dir_dataset) and list_missing_original:
+        output_dir_original = os.path.join(output_dir, "original")
+        set_found = set()
+        for item in iter_archive(path_dir_dataset, list_missing_original):
+            write_json(item, os.path.join(output_dir_original, f"{item['JID']}.json"))
+            set_found.add(item["JID"])
+        dict_missing["original"] = [jid for jid in list_missing_original if jid not in set_found]
+    return dict_missing
+
+def export():
+
+    parser = argparse.ArgumentParser(description = "Exporting the files of a JID subset, e.g., a delivery for NCSIST")
+
+    parser.add_argument('expression', type = str, nargs = '?', default = None, help = 'Set expression over the JID lists, see query.py set, e.g., "threshold ∩ history_filtered − duplicate_JID"')
+    parser.add_argument('--jid_list', type = str, default = None, help = 'Text file of JIDs, instead of an expression')
+    parser.add_argument('--store', type = str, default = "./lists/jidset.sqlite", help = 'Path to the JID set store (default: "./lists/jidset.sqlite")')
+    parser.add_argument('--output', type = str, default = "./temp/delivery/", help = 'Directory of the delivery, new or empty (default: "./temp/delivery/")')
+    parser.add_argument('--original', type = str, default = "./assets/", help = 'Store of the original judgments (default: "./assets/")')
+    parser.add_argument('--extracted', type = str, default = "./dataset/", help = 'Store of the extracted judgments, "" to skip (default: "./dataset/")')
+    parser.add_argument('--result', type = str, default = "./temp/dataset_LCS/", help = 'Store of the LCS results, "" to skip (default: "./temp/dataset_LCS/")')
+    parser.add_argument('--dataset', type = str, default = "../Dataset/", help = 'RAR archives for originals missing from the store, "" to skip (default: "../Dataset/")')
+    parser.add_argument('--copy', action = 'store_true', help = 'Copy the files instead of linking them')
+    parser.add_argument('--archive', type = str, default = None, help = 'Also pack the delivery into this .tar, .tar.gz or .tar.xz (default: off)')
+
+    args = parser.parse_args()
+
+    if args.archive:
+        archive_mode(args.archive)
+    if os.path.isdir(args.output) and os.listdir(args.output):
+        raise ValueError(f"Output directory {args.output} is not empty, files of an earlier delivery would be delivered again")
+
+    if args.jid_list:
+        list_jid = reader_txt(args.jid_list)
+    elif args.expression:
+        with JidSetStore(args.store) as store:
+            store.refresh()
+            list_jid = store.query(args.expression)
+    else:
+        raise ValueError("A set expression or --jid_list is required")
+    print(f"Total JIDs: {len(list_jid)}")
+
+    dict_source = {"original": args.original, "extracted": args.extracted, "result": args.result}
+    dict_source = {name: path_dir for name, path_dir in dict_source.items() if path_dir}
+    dict_missing = export_subset(list_jid, dict_source, args.output, args.dataset or None, "copy" if args.copy else "link")
+    for name, list_missing in dict_missing.items():
+        if list_missing:
+            print(f"Warning: {len(list_missing)} JIDs without a file in {name}, e.g., {list_missing[0]}", file = sys.stderr)
+
+    if args.archive:
+        pack(args.output, args.archive)
+        print(f"Archive: {args.archive}")
+
+if __name__ == "__main__":
+    export()
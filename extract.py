@@ -1,10 +1,801 @@
 import os
+import re
+import sys
+import json
+import time
+import argparse
+from array import array
+from contextlib import nullcontext
 
-from utility import reader_jsonl, reader_txt
+import regex
+import rarfile
+from tqdm import tqdm
+
+from utility import reader_txt, write_output, write_json, Writer, Profiler, open_text, jid_of_file, load_directory
+
+### variables for notations
+r1  = ('①','②','③','④','⑤','⑥','⑦','⑧','⑨','⑩','⑪','⑫','⑬','⑭','⑮','⑯','⑰','⑱','⑲','⑳')
+r2  = ('⑴','⑵','⑶','⑷','⑸','⑹','⑺','⑻','⑼','⑽','⑾','⑿','⒀','⒁','⒂','⒃','⒄','⒅','⒆','⒇')
+r3  = ('Ⅰ','Ⅱ','Ⅲ','Ⅳ','Ⅴ','Ⅵ','Ⅶ','Ⅷ','Ⅸ','Ⅹ')
+r4  = ('壹、', '貳、', '參、', '叄、', '叁、', '参、', '肆、', '伍、', '陸、', '柒、', '捌、', '玖、', '拾、')
+r5  = ('㈠','㈡','㈢','㈣','㈤','㈥','㈦','㈧','㈨','㈩')
+r6  = ('㊀', '㊁', '㊂', '㊃', '㊄', '㊅', '㊆', '㊇', '㊈', '㊉')
+r7  = ('❶', '❷', '❸', '❹', '❺', '❻', '❼', '❽', '❾', '❿', '⓫', '⓬', '⓭', '⓮', '⓯', '⓰', '⓱', '⓲', '⓳', '⓴')
+r8  = ('⒈', '⒉', '⒊', '⒋', '⒌', '⒍', '⒎', '⒏', '⒐', '⒑', '⒒', '⒓', '⒔', '⒕', '⒖', '⒗', '⒘', '⒙', '⒚', '⒛')
+r9  = ('⓵', '⓶', '⓷', '⓸', '⓹', '⓺', '⓻', '⓼', '⓽', '⓾')
+r10 = ('（一）', '（二）', '（三）', '（四）', '（五）', '（六）', '（七）', '（八）', '（九）', '（十）', '（十一）', '（十二）', '（十三）', '（十四）', '（十五）', '（十六）', '（十七）', '（十八）', '（十九）', '（二十）')
+r11 = ('(一)', '(二)', '(三)', '(四)', '(五)', '(六)', '(七)', '(八)', '(九)', '(十)', '(十一)', '(十二)', '(十三)', '(十四)', '(十五)', '(十六)', '(十七)', '(十八)', '(十九)', '(二十)')
+r12 = ('一、', '二、', '三、', '四、', '五、', '六、', '七、', '八、', '九、', '十、', '十一、', '十二、', '十三、', '十四、', '十五、', '十六、', '十七、', '十八、', '十九、', '二十 ')
+r13 = ('A.', 'B.', 'C.', 'D.', 'E.', 'F.', 'G.', 'H.', 'I.', 'J.', 'K.')
+r14 = ('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.', '11.', '12.', '13.', '14.', '15.', '16.', '17.', '18.', '19.', '20.')
+r15 = ('甲、', '乙、', '丙、', '丁、', '戊、', '己、', '庚、', '辛、', '壬、', '奎、')
+list_notation_all = [r15, r4, r12, r11, r10, r5, r14, r13, r6, r1, r2, r7, r8, r9, r3]
+### variables for notations
+
+### variables for keys
+key_list = ["原告主張", "被告則以", "不爭議項", "法院心證", "爭議事項"]
+### variables for keys
+
+### variables for logs
+list_log_name = ["all", "fact", "title", "notation", "2nd", "waiver", "timeout"]
+### variables for logs
+
+### patterns of split_defense, compiled once with regex so that searches can run under a time budget
+dict_pattern_defense = {
+    "pattern_plaintiff": regex.compile(r"(?:^|[、])\s*((?:本件)?(?:原告|被上訴人|上訴人)(?:等)?(?:起訴)?(?:主張|聲明|方面))"),
+    "pattern_defendant": regex.compile(r"(?:^|[、])\s*(((?:被告)(?:等)?(?:主張|部分|則以|聲明|答辯|抗辯|辯以|辯稱|方面))|(?:被上訴人|上訴人)(?:等)?(?:則以|答辯|抗辯|辯以)|(?:被上訴人)(?:等)?(?:方面))"),
+    "pattern_noArgument": regex.compile(r"不爭執(?:之)?(?:事項|事實|要旨|處)"),
+    "pattern_argument": regex.compile(r"(?<!不)爭執(?:之)?(?:事項|事實|要旨|處)|^(?!.*不爭執(?:之)?事項).*爭點"),
+    "pattern_reason": regex.compile(r"(得心證(?:之|的)?理由|(?:法院|本院)(?:之|的)?(?:判斷|論斷|認定)|(?:茲)?分述(?:如下|之)?)"),
+    ### patterns of 2nd search
+    "pattern_plaintiff_2": regex.compile(r"(?:^|[、])\s*((?:[\u4e00-\u9fa5○（）()、，0-9０-９]{1,50})(?:起訴)?(?:主張|聲明)(?:略以)?[：:])"),
+    "pattern_defendant_2": regex.compile(r"(?:^|[、])\s*(((?:被告)(?:等)?(?:主張|部分|則以|聲明|答辯|抗辯|辯以|辯稱))|(?:[\u4e00-\u9fa5○（）()、，0-9０-９]{1,50})(?:則以|答辯|抗辯|辯以|辯稱)(?:略以)?[：:])"),
+    "pattern_reason_2": regex.compile(r"(?:經查)[：:]"),
+    ### patterns of 被告未於言詞辯論期日到場
+    "pattern_defendant_waiver": regex.compile(r"(?:被告)?未於言詞辯論期日到場"),
+    ### patterns of older judgment which has "事實" and "理由" as keys
+    "pattern_plaintiff_2key": regex.compile(r"(?:^|[、])\s*((?:原告|上訴人)(?:等)?(?:起訴)?(?:方面|主張|聲明))"),
+    "pattern_defendant_2key": regex.compile(r"(?:^|[、])\s*(((?:被告)(?:等)?(?:方面|主張|部分|則以|聲明|答辯|抗辯|辯以|辯稱))|(?:被上訴人)(?:等)?(?:方面|則以|答辯|抗辯|辯以))"),
+    "pattern_plaintiff_2_2key": regex.compile(r"(?:^|[、])\s*((?:[\u4e00-\u9fa5○（）()、，0-9０-９]{1,50})(?:起訴)?(?:方面|主張|聲明)[：:])"),
+    "pattern_defendant_2_2key": regex.compile(r"(?:^|[、])\s*((?:[\u4e00-\u9fa5○（）()、，0-9０-９]{1,50})(?:則以|答辯|抗辯|辯以|辯稱)[：:])"),
+    ### patterns of 原告、被告方面 + 沒有項目編號 - deprecated
+    "pattern_plaintiff_no_number": regex.compile(r"(?:原告|上訴人)(?:等)?(?:起訴)?(?:主張|聲明|方面)[：:]"),
+}
+### patterns of split_defense
+
+PATTERN_SPACE = re.compile(r'\s')
+PATTERN_LINE_BREAK = re.compile(r'\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]') # same separators as str.splitlines
+
+class Span:
+    """
+    (start, end) span into the judgment full text, so each judgment keeps JFULL only once.
+    the text of a span is materialized lazily, with whitespace removed as the extracted result expects.
+    """
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: str, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def __str__(self) -> str:
+        return PATTERN_SPACE.sub('', self.source[self.start:self.end])
+
+    def __repr__(self) -> str:
+        return f"Span({self.start}, {self.end})"
+
+class Segments:
+    """
+    ordered sentences of a section, the segment number of each sentence is kept in a parallel array.
+    iterating yields the sentences in text order, the {"1": [...], "2": [...]} shape is only built by to_json.
+    """
+    __slots__ = ("numbers", "sentences")
+
+    def __init__(self):
+        self.numbers = array('I')
+        self.sentences = []
+
+    def append(self, number: int, sentence):
+        self.numbers.append(number)
+        self.sentences.append(sentence)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def to_json(self) -> dict:
+        """
+        returns:
+            dict_segment: dict, segment number (str) to the materialized sentences.
+        """
+        dict_segment = dict()
+        for number, sentence in zip(self.numbers, self.sentences):
+            dict_segment.setdefault(str(number), []).append(materialize(sentence))
+        return dict_segment
+
+def _iter_lines(text: str, start: int = 0, end: int = None):
+    """
+    yield (start, end) of each line in text[start:end], equivalent to str.splitlines without copying lines.
+    args:
+        text: str, full text.
+        start: int, start offset.
+        end: int, end offset, default is the end of text.
+    yields:
+        (line_start, line_end): tuple, span of a line without its line break.
+    """
+    end = len(text) if end is None else end
+    pos = start
+    for match in PATTERN_LINE_BREAK.finditer(text, start, end):
+        yield pos, match.start()
+        pos = match.end()
+    if pos < end:
+        yield pos, end
+
+def materialize(value):
+    """
+    convert spans in an extracted judgment back to strings, returning the json shape written to disk.
+    args:
+        value: Span, Segments, dict, list or any json value.
+    returns:
+        value with every Span replaced by its text and every Segments by its dict.
+    """
+    if isinstance(value, Span):
+        return str(value)
+    if isinstance(value, Segments):
+        return value.to_json()
+    if isinstance(value, dict):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    return value
+
+def crop_judgment(judgment: dict ) -> dict:
+    """
+    學長的code
+    sections are stored as Span into JFULL instead of copied line lists.
+    """
+    # init
+    result = dict()
+    jfull_raw = judgment['JFULL']
+    result['案由'] = judgment['JTITLE']
+    result['年份'] = judgment['JYEAR']
+    result['字別'] = judgment['JCASE']
+
+    # build patterns, matched with pos/endpos on JFULL so the anchor is implied by match()
+    titles = ['主文', '事實', '理由', '事實及理由', '事實及理由要領']
+    titles2 = ['相對人', '被告']
+    pattern_title = re.compile(r'\s*(' + '|'.join([r'\s*'.join(title) for title in titles]) + r')\s*$')
+    pattern_date = re.compile(r'\s*中\s*華\s*民\s*國.*年.*月.*日\s*$')
+    pattern_party = re.compile(r'.\s+.\s+人|原\s+告|上列')
+
+    # divide section
+    flag = None
+    for num, (start, end) in enumerate(_iter_lines(jfull_raw)):
+        if num == 0: # 標題=line1 e.g., 臺灣臺北地方法院民事簡易判決\u3000\u3000\u3000108年度北勞簡字第33號
+            result['標題'] = Span(jfull_raw, start, end)
+
+        # section
+        if pattern_title.match(jfull_raw, start, end) is not None:
+            flag = PATTERN_SPACE.sub('', jfull_raw[start:end])
+            result[flag] = Span(jfull_raw, end, end)
+        elif pattern_date.match(jfull_raw, start, end) is not None:
+            flag = None
+            break
+        elif flag is not None:
+            _extend_span(result[flag], start, end)
+    # 解決沒有主文或理由段落
+    if len(result.keys()) < 3:
+        flag = None
+        for num, (start, end) in enumerate(_iter_lines(jfull_raw)):
+            # sections
+            if pattern_party.match(jfull_raw, start, end):
+                if flag is None:
+                    flag = '內文'
+                    result[flag] = Span(jfull_raw, end, end)
+                continue
+            elif pattern_date.match(jfull_raw, start, end) is not None:
+                flag = None
+                break
+            elif flag is not None:
+                _extend_span(result[flag], start, end)
+    return result
+
+def _extend_span(span: Span, start: int, end: int):
+    """
+    extend a section span with the next line, an empty span starts at the line.
+    """
+    if span.start == span.end:
+        span.start = start
+    span.end = end
+
+def resplit_judgment_into_numbered_list(judgment: dict) -> dict:
+    """
+    學長的code
+    """
+    # init
+    result = dict()
+    segment_list = list_notation_all
+    all_segment = tuple(notation for notations in list_notation_all for notation in notations)
+
+    titles = ['標題', '年份', '案由', '字別']
+    # resplit
+    for title, text in judgment.items():
+        # 標題、案由
+        if title in titles:
+            if isinstance(text, Span):
+                result[title] = text
+            else:
+                result[title] = PATTERN_SPACE.sub('', text)
+        else:
+            sentence = None # span of the sentence being collected
+            count_segment = 1
+            main_segment_title = []
+            segments = Segments()
+            result[title] = segments
+
+            for start, end in _iter_lines(text.source, text.start, text.end):
+                l = PATTERN_SPACE.sub('', text.source[start:end])
+                if sentence is None:
+                    sentence = Span(text.source, start, end)
+                # 找到大標題
+                if not main_segment_title:
+                    for r in segment_list:
+                        if l.startswith(r):
+                            main_segment_title = r
+                            sentence.end = end
+                            break
+                    else:
+                        sentence.end = end
+
+                # 已有大類標題
+                else:
+                    # pop temp to result
+                    if l.startswith(main_segment_title):
+                        segments.append(count_segment, sentence)
+                        count_segment += 1
+                        sentence = Span(text.source, start, end)
+
+                    elif l.startswith(all_segment):
+                        segments.append(count_segment, sentence)
+                        sentence = Span(text.source, start, end)
+                    # push into temp
+                    else:
+                        sentence.end = end
+            if sentence is None:
+                sentence = Span(text.source, text.start, text.start)
+            segments.append(count_segment, sentence)
+    return result
+
+def find_notation(len_search, sentence_first):
+    """
+    想法: 找到input和global list_notation_all中r1 ~ r15的mapping符號，接著找到下一個符號
+        e.g., 找到r11 = ['(一)', '(二)', '(三)', '(四)', '(五)']中的'(一)'後回傳'(一)'和'(二)'
+    args:
+        sentence_first: string, 第一個句子，原告主張、被告則以...的開頭句子
+    return:
+        notation_first: string, 第一個句子的notation
+        notation_next: string, 第一個句子後面的下一個notation
+    """
+    pointer = False
+    len_head = len_search if len(sentence_first) > len_search else len(sentence_first)
+    sentence_head = sentence_first[:len_head]
+    notation_first = None
+    notation_next = None
+    for i in range(len(list_notation_all)):
+        if pointer:
+            break
+        for j, notation in enumerate(list_notation_all[i]):
+            if notation in sentence_head:
+                pointer = True
+                notation_first = notation
+                notation_next = list_notation_all[i][j + 1] if j + 1 < len(list_notation_all[i]) else None
+                break
+    if not pointer:
+        return None, None
+    return notation_first, notation_next
+
+def find_next_sentence(notation_next, sentence):
+    len_head = 50 if len(sentence) > 50 else len(sentence)
+    if notation_next != "參":
+        return notation_next in sentence[:len_head] if notation_next else False
+    ### in case of "參" is used as notation
+    list_third = ['參、', '参、', '叁、', '叄、']
+    for notation in list_third:
+        if notation in sentence[:len_head]:
+            return True
+    return False
+    ### in case of "參" is used as notation
+
+def _remaining(deadline: float) -> float:
+    """
+    seconds left before deadline, None if there is no deadline.
+    raises TimeoutError if the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("regex time budget exceeded")
+    return remaining
+
+def find_sentences(pattern: str, list_span: list, list_text: list, deadline: float = None) -> tuple:
+    """
+    args:
+        pattern: compiled pattern of the first sentence.
+        list_span: list, Span of each sentence.
+        list_text: list, materialized text of each sentence, parallel to list_span.
+        deadline: float, time.monotonic() deadline of the pattern searches, TimeoutError is raised when exceeded.
+    returns:
+        temp_list: list, Span of the found sentences.
+        pointer_notation: bool, False if the notation of the first sentence is undefined.
+    """
+    temp_list = []
+    pointer = False
+    pointer_notation = True
+    notation_first = None
+    notation_next = None
+    len_search = 10
+    for span, sentence in zip(list_span, list_text):
+        if not pointer:
+            if pattern.search(sentence, timeout = _remaining(deadline)):
+                pointer = True
+                temp_list.append(span)
+                notation_first, notation_next = find_notation(len_search, sentence)
+                if notation_first is None or notation_next is None:
+                    len_search = 50 # 2nd search
+                    notation_first, notation_next = find_notation(len_search, sentence)
+                    if notation_first is None or notation_next is None:
+                        pointer_notation = False
+                        return temp_list, pointer_notation
+        else:
+            if find_next_sentence(notation_next, sentence):
+                break
+            temp_list.append(span)
+    return temp_list, pointer_notation
+
+def split_defense(text: str, JID: str, timeout: float = None) -> tuple:
+    """
+    邏輯
+    step1: init temp_list and pointer
+    step2: iterate through list_all to find pattern, then set pointer to True
+    step3: append sentences to temp_list until find next notation
+    timeout: float, time budget in seconds of all pattern searches of the judgment, TimeoutError is raised when exceeded.
+    """
+
+    pattern_plaintiff = dict_pattern_defense["pattern_plaintiff"]
+    pattern_defendant = dict_pattern_defense["pattern_defendant"]
+    pattern_noArgument = dict_pattern_defense["pattern_noArgument"]
+    pattern_argument = dict_pattern_defense["pattern_argument"]
+    pattern_reason = dict_pattern_defense["pattern_reason"]
+
+    ### patterns of 2nd search
+    pattern_plaintiff_2 = dict_pattern_defense["pattern_plaintiff_2"]
+    pattern_defendant_2 = dict_pattern_defense["pattern_defendant_2"]
+    pattern_reason_2 = dict_pattern_defense["pattern_reason_2"]
+    ### patterns of 2nd search
+
+    ### patterns of 被告未於言詞辯論期日到場
+    pattern_defendant_waiver = dict_pattern_defense["pattern_defendant_waiver"]
+    ### patterns of 被告未於言詞辯論期日到場
+
+    deadline = time.monotonic() + timeout if timeout else None
+
+    titles_prior = {'事實', '理由', '事實及理由', '事實及理由要領'} # care '主文'造成的key值混淆
+    titles_candidate = {'主文'}
+
+    dict_log_title = dict() # storing log with judgment mapping "主文"
+    dict_log_notation = dict() # storing log with judgment having undefined notation
+    dict_log_2nd = dict() # storing log with judgment having 2nd search
+    dict_log_waiver = dict() # storing log with 被告未於言詞辯論期日到場
+
+    pointer_notation = False
+    pointer_2key = False
+
+    match_key = None
+    match_key_reason = None # for older judgment which has "事實" and "理由" as keys
+
+    match_title = titles_prior & text.keys()
+    if len(match_title) > 2:
+        dict_log_title = {JID: "有多個事實或理由"}
+        return text, dict_log_title, dict_log_notation, dict_log_2nd, dict_log_waiver
+    if "事實" in match_title and "理由" in match_title:
+        pointer_2key = True
+        match_key = "事實"
+        match_key_reason = "理由"
+        pattern_plaintiff = dict_pattern_defense["pattern_plaintiff_2key"]
+        pattern_defendant = dict_pattern_defense["pattern_defendant_2key"]
+        pattern_plaintiff_2 = dict_pattern_defense["pattern_plaintiff_2_2key"]
+        pattern_defendant_2 = dict_pattern_defense["pattern_defendant_2_2key"]
+    elif match_title:
+        match_key = match_title.pop()
+    else:
+        match_title = titles_candidate & text.keys()
+        if match_title:
+            match_key = match_title.pop()
+            dict_log_title = {JID: "無事實或理由，從主文get"}
+        else:
+            dict_log_title = {JID: "無事實或理由及主文"}
+            return text, dict_log_title, dict_log_notation, dict_log_2nd, dict_log_waiver
+    # segments are kept in text order, so sentences are iterated directly
+    list_all = text[match_key].sentences
+
+    # list_all_reason for older judgment which has "事實" and "理由" as keys
+    if match_key_reason:
+        list_all_reason = text[match_key_reason].sentences
+        list_all_reason_text = [str(span) for span in list_all_reason]
+
+    list_all_text = [str(span) for span in list_all] # materialized once per judgment for pattern search
+
+    temp_dict = dict()
+
+    ### extract the 原告主張
+    # key_list[0] should be "原告主張"
+    temp_dict[key_list[0]], pointer = find_sentences(pattern_plaintiff, list_all, list_all_text, deadline)
+    if not pointer and not pointer_notation:
+        pointer_notation = True
+        dict_log_notation[JID] = "notation"
+    if not temp_dict[key_list[0]] and pointer: # 2nd search
+        temp_dict[key_list[0]], pointer = find_sentences(pattern_plaintiff_2, list_all, list_all_text, deadline)
+        dict_log_2nd[JID] = [key_list[0]]
+    ### extract the 原告主張
+
+    ### extract the 被告則以
+    # key_list[1] should be "被告則以"
+    temp_dict[key_list[1]], pointer = find_sentences(pattern_defendant, list_all, list_all_text, deadline)
+    if not pointer and not pointer_notation:
+        pointer_notation = True
+        dict_log_notation[JID] = "notation"
+    if not temp_dict[key_list[1]] and pointer: # 2nd search
+        temp_dict[key_list[1]], pointer = find_sentences(pattern_defendant_2, list_all, list_all_text, deadline)
+        if dict_log_2nd:
+            dict_log_2nd[JID].append(key_list[1])
+        else:
+            dict_log_2nd[JID] = [key_list[1]]
+    if not temp_dict[key_list[1]] and pointer: # if still not found, try capturing pattern "被告未於言詞辯論期日到場"
+        finding, pointer = find_sentences(pattern_defendant_waiver, list_all, list_all_text, deadline)
+        if pointer and finding:
+            temp_dict[key_list[1]] = ["被告未於言詞辯論期日到場"]
+            dict_log_waiver[JID] = "未於言詞辯論期日到場"
+    ### extract the 被告則以
+
+    ### extract the 不爭執事項
+    # key_list[2] should be "不爭執事項" or "不爭議事項"
+    temp_dict[key_list[2]], pointer = find_sentences(pattern_noArgument, list_all, list_all_text, deadline)
+    if not pointer and not pointer_notation:
+        pointer_notation = True
+        dict_log_notation[JID] = "notation"
+    ### extract the 不爭執事項
+
+    ### extract the 本院心證
+    # key_list[3] should be "本院心證" or "法院心證"
+    temp_dict[key_list[3]], pointer = find_sentences(pattern_reason, list_all, list_all_text, deadline)
+    if not pointer and not pointer_notation:
+        pointer_notation = True
+        dict_log_notation[JID] = "otation"
+    if not temp_dict[key_list[3]] and pointer and match_key_reason: # for older judgment
+        temp_dict[key_list[3]], pointer = find_sentences(pattern_reason, list_all_reason, list_all_reason_text, deadline)
+        if not temp_dict[key_list[3]] and pointer: # if still not found, try using all text "理由" - 2nd search
+            temp_dict[key_list[3]] = list_all_reason
+            if dict_log_2nd:
+                dict_log_2nd[JID].append(key_list[3])
+            else:
+                dict_log_2nd[JID] = [key_list[3]]
+    ### extract the 本院心證
+
+    ### extract the 爭執事項
+    # key_list[4] should be "爭執事項" or "爭議事項"
+    temp_dict[key_list[4]], pointer = find_sentences(pattern_argument, list_all, list_all_text, deadline)
+    if not pointer and not pointer_notation:
+        pointer_notation = True
+        dict_log_notation[JID] = "notation"
+    ### extract the 爭執事項
+
+    ### extract the 本院心證 - 2nd search
+    # 由於以些判決法院心證和爭執事項會放一起，所以法院心證 - 2nd search的時間點放在爭執事項之後
+    if not temp_dict[key_list[3]] and not temp_dict[key_list[4]] and not dict_log_notation:
+        temp_dict[key_list[3]], _ = find_sentences(pattern_reason_2, list_all, list_all_text, deadline) # 不會有list_all_reason的情況
+    ### extract the 本院心證 - 2nd search
+
+    # notice diff
+    # text[match_key] = temp_dict
+    if match_key != '主文' and not pointer_2key:
+        text.pop(match_key, None)
+    if pointer_2key:
+        text.pop('事實', None)
+        text.pop('理由', None)
+    text["事實及理由"] = temp_dict
+    return text, dict_log_title, dict_log_notation, dict_log_2nd, dict_log_waiver
+
+def check(judgment: str) -> tuple:
+    """
+    check if the judgment has the keys '案由', '年份', '字別', '標題', '主文', '事實及理由': {'原告主張', '被告則以', '本院心證'}, '檔案名稱'
+    """
+    dic_all = dict()
+    dic_fact = dict()
+    match_title = {'事實及理由'} & judgment.keys()
+    if match_title:
+        match_key = match_title.pop()
+    else:
+        match_title = {'主文'} & judgment.keys()
+        if match_title:
+            match_key = match_title.pop()
+        else:
+            dic_all[judgment['檔案名稱']] = ['主文', '事實及理由']
+            dic_fact[judgment['檔案名稱']] = ['all keys are empty']
+            return dic_all, dic_fact
+
+    keys_all = ['案由', '年份', '字別', '標題', '主文', match_key, '檔案名稱']
+    keys_fact = [key_list[0], key_list[1], key_list[3], key_list[4]]
+    empty_keys_all = [key for key in keys_all if key in judgment.keys() and len(judgment[key]) == 0]
+    empty_keys_fact = [key for key in keys_fact if key in judgment[match_key] and (len(judgment[match_key][key]) == 0)]
+    
+    if empty_keys_all:
+        dic_all[judgment['檔案名稱']] = empty_keys_all
+    if keys_fact[0] in empty_keys_fact or keys_fact[1] in empty_keys_fact or (keys_fact[2] in empty_keys_fact and keys_fact[3] in empty_keys_fact):
+        dic_fact[judgment['檔案名稱']] = empty_keys_fact
+    return dic_all, dic_fact
+
+def check_log(log: dict, list_log: list) -> list:
+    if log:
+        list_log.append(log)
+    return list_log
+
+def iter_directory(path_dir: str, list_jid: list = None):
+    """
+    yield raw judgments from a directory of per-file json, e.g., "./assets/", in the order of the file names.
+    the files are read ahead by a thread pool, see utility.load_directory.
+    args:
+        path_dir: str, directory of {JID}.json files.
+        list_jid: list, only JIDs in the list are read, default is all files.
+    yields:
+        data: dict, raw judgment.
+    """
+    yield from load_directory(path_dir, list_jid)
+
+def iter_jsonl(file_path: str, list_jid: list = None):
+    """
+    yield raw judgments from a JSONL file, one judgment per line.
+    args:
+        file_path: str, path to the JSONL file.
+        list_jid: list, only JIDs in the list are yielded, default is all lines.
+    yields:
+        data: dict, raw judgment.
+    """
+    set_jid = set(list_jid) if list_jid is not None else None
+    with open_text(file_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if set_jid is not None and data["JID"] not in set_jid:
+                continue
+            yield data
+
+def iter_archive(path_dir_dataset: str, list_jid: list = None):
+    """
+    yield raw judgments straight from the RAR archives, e.g., "../Dataset/".
+    the member list of each archive is used as index, so only the requested JIDs are decompressed.
+    args:
+        path_dir_dataset: str, directory of RAR files.
+        list_jid: list, only JIDs in the list are read, default is all json files.
+    yields:
+        data: dict, raw judgment.
+    """
+    set_jid = set(list_jid) if list_jid is not None else None
+    for doc in tqdm(sorted(os.listdir(path_dir_dataset)), desc = "Processing RAR files"):
+        file_path = os.path.join(path_dir_dataset, doc)
+        with rarfile.RarFile(file_path) as rf:
+            for fileinfo in rf.infolist():
+                file_name = fileinfo.filename
+                if not file_name.endswith(".json"):
+                    continue
+                JID = jid_of_file(os.path.basename(file_name))
+                if set_jid is not None and JID not in set_jid:
+                    continue
+                with rf.open(file_name) as jf:
+                    yield json.load(jf)
+
+def _stage(profiler: Profiler, name: str):
+    """
+    stage of the profiler, or a no-op context if profiling is off.
+    """
+    return profiler.stage(name) if profiler else nullcontext()
+
+def extract_judgment(data: dict, profiler: Profiler = None, timeout: float = None) -> tuple:
+    """
+    extract one raw judgment.
+    args:
+        data: dict, raw judgment with keys JID, JTITLE, JYEAR, JCASE, JFULL.
+        profiler: Profiler, record time and memory of each stage if given.
+        timeout: float, time budget in seconds of the pattern searches, no budget if None.
+    returns:
+        judgment: dict, extracted judgment in the json shape written to disk, None if over the time budget.
+        dict_log: dict, log name to the log of this judgment, empty dict if nothing to log.
+    """
+    jid = data['JID']
+    if profiler:
+        profiler.document(jid, len(data['JFULL']))
+    with _stage(profiler, "crop_judgment"):
+        dict_judgment = crop_judgment(data)
+    with _stage(profiler, "resplit_judgment_into_numbered_list"):
+        judgment_string = resplit_judgment_into_numbered_list(dict_judgment)
+    if profiler:
+        segment_count = sum(value.numbers[-1] for value in judgment_string.values() if isinstance(value, Segments) and value.numbers)
+        profiler.annotate(segment_count = segment_count)
+    dict_log = {name: {} for name in list_log_name}
+    try:
+        with _stage(profiler, "split_defense"):
+            judgment, dict_log_title, dict_log_notation, dict_log_2nd, dict_log_waiver = split_defense(judgment_string, jid, timeout)
+    except TimeoutError:
+        dict_log["timeout"] = {jid: f"pattern search over {timeout} s"}
+        return None, dict_log
+    judgment['檔案名稱'] = jid + '.json'
+    with _stage(profiler, "materialize"):
+        judgment = materialize(judgment)
+    with _stage(profiler, "check"):
+        dict_log_all, dict_log_fact = check(judgment)
+    dict_log.update({
+        "all": dict_log_all,
+        "fact": dict_log_fact,
+        "title": dict_log_title,
+        "notation": dict_log_notation,
+        "2nd": dict_log_2nd,
+        "waiver": dict_log_waiver
+    })
+    return judgment, dict_log
+
+def iter_extract(judgments, profiler: Profiler = None, timeout: float = None):
+    """
+    streaming extraction over any iterator of raw judgments.
+    args:
+        judgments: iterable of dict, e.g., iter_directory, iter_jsonl or iter_archive.
+        profiler: Profiler, record time and memory of each stage if given.
+        timeout: float, per-document time budget in seconds of the pattern searches, no budget if None.
+    yields:
+        (event, payload): tuple, ("record", judgment) for each extracted judgment,
+            followed by (log name, log) for each non-empty log of that judgment.
+            a judgment over the time budget has no record, only a "timeout" log.
+    """
+    for data in judgments:
+        judgment, dict_log = extract_judgment(data, profiler, timeout)
+        if judgment is not None:
+            yield "record", judgment
+        for name in list_log_name:
+            if dict_log[name]:
+                yield name, dict_log[name]
+
+class DirectorySink:
+    """
+    write each extracted judgment to {path_dir}/{檔案名稱}.
+    """
+    def __init__(self, path_dir: str):
+        self.path_dir = path_dir
+
+    def write(self, judgment: dict):
+        write_json(judgment, os.path.join(self.path_dir, judgment['檔案名稱']))
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass # every judgment file is committed on its own
+
+class JsonlSink:
+    """
+    write extracted judgments into one JSONL file, one judgment per line, the file replaces output_path when the run completes.
+    """
+    def __init__(self, output_path: str):
+        self.writer = Writer(output_path, policy = "overwrite").open()
+
+    def write(self, judgment: dict):
+        self.writer.write(judgment)
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+class StdoutSink:
+    """
+    write extracted judgments to stdout as JSONL, for piping into other tools.
+    """
+    def write(self, judgment: dict):
+        sys.stdout.write(json.dumps(judgment, ensure_ascii = False) + "\n")
+
+    def close(self):
+        sys.stdout.flush()
+
+    def abort(self):
+        sys.stdout.flush()
+
+def get_sink(name: str, output_path: str):
+    """
+    args:
+        name: str, "dir", "jsonl" or "stdout".
+        output_path: str, directory for "dir", file for "jsonl", ignored for "stdout".
+    returns:
+        sink: object with write(judgment), close() and abort().
+    """
+    if name == "dir":
+        return DirectorySink(output_path)
+    if name == "jsonl":
+        return JsonlSink(output_path)
+    if name == "stdout":
+        return StdoutSink()
+    raise ValueError(f"Unknown sink: {name}")
+
+def extract_all(judgments, sink, dir_log: str = None, profiler: Profiler = None, timeout: float = None) -> dict:
+    """
+    run the extraction over judgments, stream records into sink and write logs at the end.
+    args:
+        judgments: iterable of dict, raw judgments.
+        sink: object with write(judgment), close() and abort().
+        dir_log: str, directory of log_{name}.jsonl files, logs are not written if None.
+        profiler: Profiler, record time and memory of each stage including the write if given.
+        timeout: float, per-document time budget in seconds of the pattern searches, no budget if None.
+    returns:
+        dict_list_log: dict, log name to the list of logs.
+    """
+    dict_list_log = {name: [] for name in list_log_name}
+    count_record = 0
+    try:
+        for event, payload in iter_extract(tqdm(judgments, desc = "Processing JSON files"), profiler, timeout):
+            if event == "record":
+                with _stage(profiler, "write"):
+                    sink.write(payload)
+                count_record += 1
+            else:
+                dict_list_log[event] = check_log(payload, dict_list_log[event])
+    except BaseException:
+        sink.abort() # an interrupted run does not replace a previous output
+        raise
+    sink.close()
+    if dir_log:
+        for name in list_log_name:
+            write_output(dict_list_log[name], os.path.join(dir_log, f"log_{name}.jsonl"))
+    print(f"Total judgments extracted: {count_record}", file = sys.stderr)
+    for name in list_log_name:
+        print(f"Total judgments in log_{name}: {len(dict_list_log[name])}", file = sys.stderr)
+    return dict_list_log
 
 def extract():
 
-    print("Extracting data...")
+    parser = argparse.ArgumentParser(description = "Extracting sections of judgments")
+
+    parser.add_argument('--source', type = str, default = "dir", choices = ["dir", "jsonl", "archive"], help = 'Input dir|jsonl|archive (default: "dir")')
+    parser.add_argument('--input', type = str, default = "./assets/", help = 'Directory of json files, JSONL file or directory of RAR files (default: "./assets/")')
+    parser.add_argument('--jid_list', type = str, default = None, help = 'Text file of JIDs to extract (default: all)')
+    parser.add_argument('--sink', type = str, default = "dir", choices = ["dir", "jsonl", "stdout"], help = 'Output dir|jsonl|stdout (default: "dir")')
+    parser.add_argument('--output', type = str, default = "./dataset/", help = 'Output directory or JSONL file (default: "./dataset/")')
+    parser.add_argument('--dir_log', type = str, default = "./logs/extraction/", help = 'Directory of extraction logs (default: "./logs/extraction/")')
+    parser.add_argument('--timeout', type = float, default = 10.0, help = 'Time budget in seconds of the pattern searches per judgment, 0 for no budget (default: 10.0)')
+    parser.add_argument('--profile', type = str, default = None, help = 'Write the per-stage profile report to this json file (default: off)')
+    parser.add_argument('--profile_top', type = int, default = 20, help = 'Number of slowest JIDs in the profile report (default: 20)')
+
+    args = parser.parse_args()
+
+    list_jid = reader_txt(args.jid_list) if args.jid_list else None
+
+    if args.source == "dir":
+        judgments = iter_directory(args.input, list_jid)
+    elif args.source == "jsonl":
+        judgments = iter_jsonl(args.input, list_jid)
+    else:
+        judgments = iter_archive(args.input, list_jid)
+
+    profiler = Profiler() if args.profile else None
+
+    sink = get_sink(args.sink, args.output)
+    extract_all(judgments, sink, args.dir_log, profiler, args.timeout or None)
+
+    if profiler:
+        profiler.close()
+        write_json(profiler.report(args.profile_top), args.profile)
+        for line in profiler.format_report(args.profile_top):
+            print(line, file = sys.stderr)
 
 if __name__ == "__main__":
-    extract()
\ No newline at end of file
+    extract()
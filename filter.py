@@ -6,7 +6,10 @@ from concurrent.futures import ProcessPoolExecutor, as_completed
 import rarfile
 from tqdm import tqdm
 
-from utility import write_output, write_json
+from utility import write_output, write_json, JID, jid_of_file
+
+INCLUSION_COURT = ("TYDV", "TYEV", "CLEV")
+INCLUSION_LEVEL = ("HV", "SV")
 
 def get_court(file_name: str) -> str:
     """
@@ -14,11 +17,12 @@ def get_court(file_name: str) -> str:
     args:
         file_name: str, JID of the file.
     returns:
-        court: str, The extracted court .
+        court: str, The extracted court, the full code of an included court, "HV" or "SV" for a level, empty otherwise.
     """
-    pattern_court = re.compile(r"TYDV|TYEV|CLEV|HV|SV")
-    match_court = pattern_court.search(file_name)
-    return match_court.group(0) if match_court else ""
+    court = JID.from_file(file_name).court
+    if court in INCLUSION_COURT:
+        return court
+    return court[-2:] if court.endswith(INCLUSION_LEVEL) else ""
 
 def filter_file(file_name: str) -> bool:
     """
@@ -68,7 +72,7 @@ def process_rar(doc, path_rar: str, output_path: str):
             file_name = fileinfo.filename
             if filter_file(file_name): 
                 continue
-            JID = file_name.split("/")[-1].split(".")[0]
+            jid = jid_of_file(os.path.basename(file_name))
             court = get_court(file_name)
             with rf.open(file_name) as jf:
                 json_data = json.load(jf)
@@ -79,15 +83,15 @@ def process_rar(doc, path_rar: str, output_path: str):
             full_text_header = json_data['JFULL'].split('\n', 1)[0]
             if filter_content(full_text_header): 
                 results["counter_no_judgment"] += 1
-                results["list_no_judgment"].append(JID)
+                results["list_no_judgment"].append(jid)
                 if court != "SV":
                     continue
                 results["counter_no_judgment_SV"] += 1
-                results["list_no_judgment_SV"].append(JID)
+                results["list_no_judgment_SV"].append(jid)
             else:
                 results["counter_judgment"] += 1
-                results["list_judgment"].append(JID)
-            output_file = os.path.join(output_path, f"{JID}.json")
+                results["list_judgment"].append(jid)
+            output_file = os.path.join(output_path, f"{jid}.json")
             write_json(json_data, output_file)
     return results
 
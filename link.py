@@ -2,11 +2,12 @@ import os
 import re
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
-from utility import reader_txt, reader_json, write_output, get_html, get_content, get_head
+from utility import reader_txt, reader_json, iter_json, write_output, write_history, get_html, get_content, get_head, Throttle, CaseGraph, ChainAnalytics, JsonlIndex, resolve_court
 
 def filter_empty_history(list_judgments: list) -> tuple:
     """
@@ -61,10 +62,45 @@ def filter_history_jid(jid: str) -> int:
         return 1
     return 0
 
-def filter_decision(list_judgments_non_empty_history: list) -> tuple:
+def classify_history_jid(list_jid: list, max_workers: int = 10) -> dict:
     """
+    classify each distinct history JID once with a bounded thread pool, requests are throttled in the workers.
+    a failed request stops the stage, as a sequential loop would, the pending requests are cancelled.
+    args:
+        - list_jid: list, JIDs of histories, duplicates are classified once.
+        - max_workers: int, number of concurrent requests.
+    returns:
+        - dict_int_case: dict, JID to int_case returned by filter_history_jid.
+    """
+    dict_int_case = {}
+    list_jid_distinct = list(dict.fromkeys(list_jid))
+    throttle = Throttle()
+
+    def classify(jid: str) -> int:
+        throttle.wait()
+        return filter_history_jid(jid)
+
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        futures = {executor.submit(classify, jid): jid for jid in list_jid_distinct}
+        for future in tqdm(as_completed(futures), total = len(futures), desc = "Classifying History JID"):
+            jid = futures[future]
+            try:
+                dict_int_case[jid] = future.result()
+            except Exception:
+                print(f"Error processing {jid}, stopping")
+                for future_pending in futures:
+                    future_pending.cancel()
+                raise
+
+    return dict_int_case
+
+def filter_decision(list_judgments_non_empty_history: list, max_workers: int = 10) -> tuple:
+    """
+    the same JID appears in the history of every member of its chain, so distinct JIDs are classified first
+    by classify_history_jid and the results are applied to every judgment.
     args:
         - list_judgments_non_empty_history: list, the list of judgments with non-empty history, including unknown text.
+        - max_workers: int, number of concurrent requests.
     returns:
         : tuple, containing:
             - list_judgments_filtered: list, judgments with filtered histories.
@@ -73,6 +109,14 @@ def filter_decision(list_judgments_non_empty_history: list) -> tuple:
     list_judgments_filtered = []
     list_history_decision = [] # 不論甚麼情形都會丟
 
+    list_jid_history = [
+        history["link2json"]
+        for judgment in list_judgments_non_empty_history
+        for history in judgment['history']
+        if history.get("link2json", None)
+    ]
+    dict_int_case = classify_history_jid(list_jid_history, max_workers)
+
     for judgment in tqdm(list_judgments_non_empty_history, desc = "Filtering Decision History"):
         jid = judgment['JID']
         histories = judgment['history']
@@ -85,7 +129,7 @@ def filter_decision(list_judgments_non_empty_history: list) -> tuple:
             jid_history = history.get("link2json", None)
             text = history.get("text", None)
             if jid_history:
-                int_case = filter_history_jid(jid_history)
+                int_case = dict_int_case[jid_history]
                 if int_case == 2:
                     histories_decision['history'].append(history)
                     continue
@@ -154,27 +198,6 @@ def filter_useless_link(list_link_wo_filter: list) -> tuple:
 
     return list_link_filtered, list_link_useless
 
-def get_link_text(text: str) -> str:
-    """
-    args:
-        - text: str, the text content of the history.
-    returns:
-        : str, the court text.
-    """
-    pattern_detail = re.compile(r"(?:臺灣|台灣)?(.{1,30}) \s*\d{2,3}\s*年") # notice space before \s*
-    pattern_overall = re.compile(r"(簡易庭|地方法院|高等法院|最高法院)[^0-9]{0,20}?\d{2,3}\s*年")
-
-    match_detail = re.search(pattern_detail, text)
-    match_overall = re.search(pattern_overall, text)
-    text_detail = match_detail.group(1) if match_detail else "Unknown Court"
-    text_detail_splited = text_detail.split(" ")
-    if len(text_detail_splited) > 1:
-        text_detail = "".join(text_detail_splited)
-    if match_detail and match_overall:
-        return text_detail, match_overall.group(1)
-    print(f"Warning: No court found in text: {text}")
-    return "Unknown Court"
-
 def linking_history(list_judgments_filtered: list) -> list:
     """
     args:
@@ -192,8 +215,7 @@ def linking_history(list_judgments_filtered: list) -> list:
         str_link_detail = ""
         str_link_overall = ""
         for history in histories:
-            text = history.get("text", None)
-            court_detail, court_overall = get_link_text(text)
+            court_detail, court_overall = resolve_court(history)
             str_link_detail = f"{str_link_detail}_{court_detail}"
             str_link_overall = f"{str_link_overall}_{court_overall}"
         judgment["link_detail"] = str_link_detail.strip("_")
@@ -202,43 +224,6 @@ def linking_history(list_judgments_filtered: list) -> list:
 
     return list_judgments_link
 
-def analysis(list_judgments: list, priority: str) -> tuple:
-    """
-    args:
-        - list_judgments: list, the list of judgments to analyze.
-        - priority: str, the priority for analysis, either "frequency" or "length".
-    returns:
-        : tuple, containing:
-            - sorted_links_overall: list, sorted links based on overall court frequency or length.
-            - sorted_links_detail: list, sorted links based on detail court frequency or length.
-    """
-    dict_link_overall = {}
-    dict_link_detail = {}
-    sorted_links_overall = []
-    sorted_links_detail = []
-    
-    for judgment in list_judgments:
-        link_overall = judgment["link_overall"]
-        link_detail = judgment["link_detail"]
-        if link_overall not in dict_link_overall:
-            dict_link_overall[link_overall] = 1
-        else:
-            dict_link_overall[link_overall] += 1
-
-        if link_detail not in dict_link_detail:
-            dict_link_detail[link_detail] = 1
-        else:
-            dict_link_detail[link_detail] += 1
-
-    if priority == "frequency":
-        sorted_links_overall = sorted(dict_link_overall.items(), key = lambda x: x[1], reverse = True)
-        sorted_links_detail = sorted(dict_link_detail.items(), key = lambda x: x[1], reverse = True)
-    else:
-        sorted_links_overall = sorted(dict_link_overall.items(), key = lambda x: len(x[0]), reverse = True)
-        sorted_links_detail = sorted(dict_link_detail.items(), key = lambda x: len(x[0]), reverse = True)
-        
-    return sorted_links_overall, sorted_links_detail
-
 def link():
     
     parser = argparse.ArgumentParser(description = "Linking judgments based on their histories")
@@ -249,6 +234,10 @@ def link():
 
     dir_name = args.dir_name
 
+    #### variable for global variables
+    MAX_WORKERS = 10
+    #### variable for global variables
+
     """
     script description:
     著重在若有上訴的情形發生，連結判決書之間的關係。
@@ -267,6 +256,7 @@ def link():
     4. analyzing the linking results
     5. filtering jid == null or secret case (but exception existing)
         a. if it is last history and length of histories_filtered > 1, remaining and extend, so output would include int_case = 1 or int_case = None
+        b. building the appeal graph of the filtered links
     6. analyzing the linking result with flitering useless judgments
     7. description size of each steps
     """
@@ -290,11 +280,13 @@ def link():
     output_path_analyze_length = f'./links/{dir_name}/analyze_overall_length_wo_filter.txt'
     output_path_analyze_freq_detail = f'./links/{dir_name}/analyze_detail_freq_wo_filter.txt'
     output_path_analyze_length_detail = f'./links/{dir_name}/analyze_detail_length_wo_filter.txt'
+    output_dir_analytics = f'./links/{dir_name}/analytics_wo_filter/'
     ### parameters for step 4.
     
     ### parameters for step 5.
     output_path_judgments_link_filtered = f'./links/{dir_name}/link_filtered.jsonl'
     output_path_judgments_link_useless = f'./links/{dir_name}/link_useless.jsonl'
+    output_path_graph = f'./links/{dir_name}/graph.json'
     ### parameters for step 5.
     
     ### parameters for step 6.
@@ -302,6 +294,7 @@ def link():
     output_path_analyze_length_filtered = f'./links/{dir_name}/analyze_overall_length_filtered.txt'
     output_path_analyze_freq_detail_filtered = f'./links/{dir_name}/analyze_detail_freq_filtered.txt'
     output_path_analyze_length_detail_filtered = f'./links/{dir_name}/analyze_detail_length_filtered.txt'
+    output_dir_analytics_filtered = f'./links/{dir_name}/analytics_filtered/'
     ### parameters for step 6.
 
     """
@@ -320,10 +313,10 @@ def link():
     list_history_decision = []
     if not os.path.exists(output_path_judgments_filtered) or not os.path.exists(output_path_judgments_decision_filter):
 
-        list_judgments_filtered, list_history_decision = filter_decision(list_judgments_non_empty_history)
+        list_judgments_filtered, list_history_decision = filter_decision(list_judgments_non_empty_history, MAX_WORKERS)
 
-        write_output(list_judgments_filtered, output_path_judgments_filtered)
-        write_output(list_history_decision, output_path_judgments_decision_filter)
+        write_history(list_judgments_filtered, output_path_judgments_filtered, normalize = False)
+        write_history(list_history_decision, output_path_judgments_decision_filter, normalize = False)
 
     """
     step 3. linking the judgments between histories
@@ -332,20 +325,18 @@ def link():
     
     list_judgments_link = linking_history(list_judgments_filtered)
 
-    write_output(list_judgments_link, output_path_judgments_link)
+    write_history(list_judgments_link, output_path_judgments_link, normalize = False)
 
     """
     step 4. analyzing the linking results
     """
-    list_link_wo_filter = reader_json(output_path_judgments_link)
+    analytics = ChainAnalytics.build(iter_json(output_path_judgments_link, fields = ["JID", "link_overall", "link_detail"]))
 
-    sorted_links_freq_overall, sorted_links_freq_detail = analysis(list_link_wo_filter, "frequency")
-    sorted_links_length_overall, sorted_links_length_detail = analysis(list_link_wo_filter, "length")
-
-    write_output([f"{link}: {count}" for link, count in sorted_links_freq_overall], output_path_analyze_freq)
-    write_output([f"{link}: {count}" for link, count in sorted_links_length_overall], output_path_analyze_length)
-    write_output([f"{link}: {count}" for link, count in sorted_links_freq_detail], output_path_analyze_freq_detail)
-    write_output([f"{link}: {count}" for link, count in sorted_links_length_detail], output_path_analyze_length_detail)
+    write_output([f"{link}: {count}" for link, count in analytics.frequency("overall")], output_path_analyze_freq)
+    write_output([f"{link}: {count}" for link, count in analytics.by_length("overall")], output_path_analyze_length)
+    write_output([f"{link}: {count}" for link, count in analytics.frequency("detail")], output_path_analyze_freq_detail)
+    write_output([f"{link}: {count}" for link, count in analytics.by_length("detail")], output_path_analyze_length_detail)
+    analytics.save(output_dir_analytics)
 
     """
     step 5. filtering jid == null or secret case (but exception existing)
@@ -354,21 +345,23 @@ def link():
 
     list_link_filtered, list_link_useless = filter_useless_link(list_link_wo_filter)
     
-    write_output(list_link_filtered, output_path_judgments_link_filtered)
-    write_output(list_link_useless, output_path_judgments_link_useless)
+    write_history(list_link_filtered, output_path_judgments_link_filtered, normalize = False)
+    write_history(list_link_useless, output_path_judgments_link_useless, normalize = False)
+    JsonlIndex.load_or_build(output_path_judgments_link_filtered) # offset index for point lookups, see query.py lookup
+
+    # appeal graph of the filtered links for chain queries, see query.py chain
+    graph = CaseGraph.load_or_build(output_path_graph, output_path_judgments_link_filtered)
 
     """
     step 6. analyzing the linking result with filtering useless judgments
     """
-    list_link_filter = reader_json(output_path_judgments_link_filtered)
-
-    sorted_links_freq_overall, sorted_links_freq_detail = analysis(list_link_filter, "frequency")
-    sorted_links_length_overall, sorted_links_length_detail = analysis(list_link_filter, "length")
+    analytics = ChainAnalytics.build(iter_json(output_path_judgments_link_filtered, fields = ["JID", "link_overall", "link_detail"]))
 
-    write_output([f"{link}: {count}" for link, count in sorted_links_freq_overall], output_path_analyze_freq_filtered)
-    write_output([f"{link}: {count}" for link, count in sorted_links_length_overall], output_path_analyze_length_filtered)
-    write_output([f"{link}: {count}" for link, count in sorted_links_freq_detail], output_path_analyze_freq_detail_filtered)
-    write_output([f"{link}: {count}" for link, count in sorted_links_length_detail], output_path_analyze_length_detail_filtered)
+    write_output([f"{link}: {count}" for link, count in analytics.frequency("overall")], output_path_analyze_freq_filtered)
+    write_output([f"{link}: {count}" for link, count in analytics.by_length("overall")], output_path_analyze_length_filtered)
+    write_output([f"{link}: {count}" for link, count in analytics.frequency("detail")], output_path_analyze_freq_detail_filtered)
+    write_output([f"{link}: {count}" for link, count in analytics.by_length("detail")], output_path_analyze_length_detail_filtered)
+    analytics.save(output_dir_analytics_filtered)
 
     """
     step 7. description size of each steps
@@ -381,6 +374,7 @@ def link():
     print(f"Total judgments with link: {len(list_judgments_link)}")
     print(f"Total judgments with link after filtering useless judgments: {len(list_link_filtered)}")
     print(f"Total judgments with useless links: {len(list_link_useless)}")
+    print(f"Total case chains in appeal graph: {graph.count_components()}")
 
     """
     result of step 7.
@@ -0,0 +1,423 @@
+import os
+import ast
+import sys
+import glob
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from utility import Writer, write_json
+
+"""
+stages of the pipeline, run in dependency order, independent stages in parallel.
+    script: stage script, run as "python {script} {args}", its source and the local modules it imports are part of the stage hash.
+    args: parameters of the script, part of the stage hash.
+    inputs: files or directories read by the stage, a stage depends on the stages with these outputs.
+    external: inputs written outside the pipeline, e.g., ../Dataset/ or ./assets/ of file_list.py, which is run by hand
+        on the moved ./links/link_filtered.jsonl. a stage with a missing external input is blocked instead of run.
+    outputs: files, directories or glob patterns written by the stage, deleted before a rerun, the scripts keep existing outputs otherwise.
+        only what the stage writes is listed, e.g., not ./lists/analysis/ with its hand-written readme.md.
+    after: stages to run first whose outputs are not inputs by path, e.g., link reads ./unique/retire/,
+        where the output of unique is moved by hand.
+a stage is skipped when the hash of its script, local modules, args and input contents is the one of its last successful run
+and its outputs exist. files are hashed by content (sha256, cached by size and mtime so an unchanged file is read once),
+directories by the relative paths and content hashes of their files.
+"""
+STAGES = {
+    "filter": {
+        "script": "filter.py",
+        "args": [],
+        "inputs": ["../Dataset/"],
+        "external": ["../Dataset/"],
+        "outputs": [
+            "./assets_retire/",
+            "./logs/filtering/files_list_judgment.txt",
+            "./logs/filtering/files_list_no_judgment.txt",
+            "./logs/filtering/files_list_no_judgment_SV.txt"
+        ]
+    },
+    "appeal": {
+        "script": "appeal.py",
+        "args": ["--depth", "1"],
+        "inputs": [
+            "./logs/filtering/files_list_judgment.txt",
+            "./logs/filtering/files_list_no_judgment_SV.txt"
+        ],
+        "outputs": [
+            "./appeal/origin_history.jsonl",
+            "./appeal/new_history.jsonl",
+            "./appeal/new_history_cleaned.jsonl",
+            "./appeal/all_history.jsonl",
+            "./logs/appealing/new_history.txt",
+            "./logs/appealing/new_history_cleaned.txt",
+            "./logs/appealing/new_history_secret.txt",
+            "./logs/appealing/new_history_no_judgment.txt",
+            "./logs/appealing/new_history_invalid.txt",
+            "./logs/appealing/all_history.txt"
+        ]
+    },
+    "unique": {
+        "script": "unique.py",
+        "args": [],
+        "inputs": ["./appeal/all_history.jsonl"],
+        "outputs": [
+            "./unique/law_index.json",
+            "./unique/filtered_history.jsonl",
+            "./unique/unique_history.jsonl",
+            "./unique/unique_history.jsonl.idx.json",
+            "./logs/unique/history_filtered.txt",
+            "./logs/unique/history_wo_relevant.txt",
+            "./logs/unique/unique_history.txt",
+            "./logs/unique/duplicate_JID.txt"
+        ]
+    },
+    "link": {
+        "script": "link.py",
+        "args": ["--dir_name", "retire"],
+        "inputs": ["./unique/retire/unique_history.jsonl"],
+        "external": ["./unique/retire/unique_history.jsonl"],
+        "outputs": [
+            "./unique/retire/judgments_empty_history.txt",
+            "./unique/retire/judgments_filtered.jsonl",
+            "./unique/retire/decision_history.jsonl",
+            "./links/retire/link_wo_filter.jsonl",
+            "./links/retire/analyze_overall_freq_wo_filter.txt",
+            "./links/retire/analyze_overall_length_wo_filter.txt",
+            "./links/retire/analyze_detail_freq_wo_filter.txt",
+            "./links/retire/analyze_detail_length_wo_filter.txt",
+            "./links/retire/analytics_wo_filter/analytics.json",
+            "./links/retire/analytics_wo_filter/*.csv",
+            "./links/retire/link_filtered.jsonl",
+            "./links/retire/link_filtered.jsonl.idx.json",
+            "./links/retire/link_useless.jsonl",
+            "./links/retire/graph.json",
+            "./links/retire/analyze_overall_freq_filtered.txt",
+            "./links/retire/analyze_overall_length_filtered.txt",
+            "./links/retire/analyze_detail_freq_filtered.txt",
+            "./links/retire/analyze_detail_length_filtered.txt",
+            "./links/retire/analytics_filtered/analytics.json",
+            "./links/retire/analytics_filtered/*.csv"
+        ],
+        "after": ["unique"]
+    },
+    "analyze": {
+        "script": "analyze.py",
+        "args": [],
+        "inputs": ["./assets/"],
+        "external": ["./assets/"],
+        "outputs": [
+            "./lists/analysis/retire/file_list.txt",
+            "./lists/analysis/retire/file_list_wo_retire.txt",
+            "./lists/analysis/basis/file_list.txt",
+            "./lists/analysis/basis/file_list_wo_basis.txt"
+        ]
+    },
+    "extract": {
+        "script": "extract.py",
+        "args": ["--source", "dir", "--input", "./assets/", "--output", "./dataset/", "--dir_log", "./logs/extraction/"],
+        "inputs": ["./assets/"],
+        "external": ["./assets/"],
+        "outputs": ["./dataset/", "./logs/extraction/log_*.jsonl"]
+    }
+}
+
+CHUNK_HASH = 1 << 20
+
+def _norm(path: str) -> str:
+    return os.path.normpath(path)
+
+def _within(path: str, path_parent: str) -> bool:
+    path, path_parent = _norm(path), _norm(path_parent)
+    return path == path_parent or path.startswith(path_parent + os.sep)
+
+def expand(path: str) -> list:
+    """
+    paths of an output, the matches of a glob pattern or the path itself.
+    """
+    return sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+
+def _module_path(name: str, root: str = ".") -> str:
+    """
+    file of a local module, e.g., "utility.history" to "./utility/history.py", None for a module not in root.
+    """
+    path_base = os.path.join(root, *name.split("."))
+    for path in (path_base + ".py", os.path.join(path_base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _exports(path_init: str) -> dict:
+    """
+    name to submodule of a package importing its submodules lazily through _EXPORTS, see utility/__init__.py.
+    """
+    with open(path_init, 'r', encoding = 'utf-8') as f:
+        tree = ast.parse(f.read(), path_init)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == "_EXPORTS" for target in node.targets):
+            return {name: module for module, names in ast.literal_eval(node.value).items() for name in names}
+    return {}
+
+def local_modules(script: str, root: str = ".") -> list:
+    """
+    local modules imported by a script, directly or through other local modules, also imports inside functions.
+    returns:
+        list_path: list, sorted files of the modules, without the script.
+    """
+    set_seen = set()
+    stack = [os.path.normpath(script)]
+    while stack:
+        path = stack.pop()
+        if path in set_seen:
+            continue
+        set_seen.add(path)
+        name = os.path.relpath(path, root)[:-len(".py")].replace(os.sep, ".")
+        package = name[:-len(".__init__")] if name.endswith(".__init__") else name.rpartition(".")[0]
+        with open(path, 'r', encoding = 'utf-8') as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                list_name = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                if node.level: # relative import, e.g., "from .reader import reader_txt" in utility
+                    parts = package.split(".") if package else []
+                    base = ".".join(parts[:len(parts) - node.level + 1] + ([node.module] if node.module else []))
+                else:
+                    base = node.module
+                list_name = [base] + [f"{base}.{alias.name}" for alias in node.names]
+                path_init = _module_path(base, root)
+                if path_init and path_init.endswith("__init__.py"):
+                    dict_export = _exports(path_init)
+                    list_name += [f"{base}.{dict_export[alias.name]}" for alias in node.names if alias.name in dict_export]
+            else:
+                continue
+            for name_module in list_name:
+                parts = name_module.split(".")
+                for i in range(1, len(parts) + 1): # a submodule imports its packages first
+                    path_module = _module_path(".".join(parts[:i]), root)
+                    if path_module:
+                        stack.append(os.path.normpath(path_module))
+    set_seen.discard(os.path.normpath(script))
+    return sorted(set_seen)
+
+def dependencies(dict_stage: dict) -> dict:
+    """
+    returns:
+        dict_dependency: dict, stage to the set of stages it depends on, by outputs read as inputs and by after.
+    """
+    dict_dependency = {}
+    for name, stage in dict_stage.items():
+        set_dependency = set(stage.get("after", []))
+        for name_other, stage_other in dict_stage.items():
+            if name_other == name:
+                continue
+            if any(_within(path, output) or _within(output, path) for path in stage["inputs"] for output in stage_other["outputs"]):
+                set_dependency.add(name_other)
+        dict_dependency[name] = set_dependency
+    return dict_dependency
+
+def order(dict_dependency: dict) -> list:
+    """
+    stages in dependency order, ties in declaration order, raise ValueError for a cycle.
+    """
+    list_order = []
+    set_done = set()
+    while len(list_order) < len(dict_dependency):
+        list_ready = [name for name, deps in dict_dependency.items() if name not in set_done and deps <= set_done]
+        if not list_ready:
+            raise ValueError(f"Cycle in the pipeline stages: {sorted(set(dict_dependency) - set_done)}")
+        list_order.extend(list_ready)
+        set_done.update(list_ready)
+    return list_order
+
+class Hasher:
+    """
+    content hashes of files, cached by path, size and mtime, so unchanged large inputs are read once.
+    """
+    def __init__(self, dict_cache: dict = None):
+        self.dict_cache = dict_cache or {}
+
+    def file(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        cached = self.dict_cache.get(file_path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_HASH), b""):
+                digest.update(chunk)
+        self.dict_cache[file_path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def directory(self, path_dir: str) -> str:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path_dir):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                digest.update(f"{os.path.relpath(file_path, path_dir)}\0{self.file(file_path)}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, path: str) -> str:
+        if os.path.isdir(path):
+            return "dir:" + self.directory(path)
+        if os.path.isfile(path):
+            return "file:" + self.file(path)
+        return "missing"
+
+    def stage(self, stage: dict) -> str:
+        digest = hashlib.sha256()
+        for path in [stage["script"]] + local_modules(stage["script"]):
+            digest.update(f"{path}\0{self.path(path)}\n".encode('utf-8'))
+        digest.update(json.dumps(stage["args"]).encode('utf-8'))
+        for path in stage["inputs"]:
+            digest.update(f"{path}\0{self.path(path)}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+def remove_outputs(stage: dict):
+    """
+    delete the outputs of a stage before it reruns, the scripts would otherwise keep them.
+    """
+    for path in (path for output in stage["outputs"] for path in expand(output)):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+def check_inputs(dict_stage: dict):
+    """
+    raise ValueError for an input neither written by a stage nor marked external, its changes would not order the stages.
+    """
+    for name, stage in dict_stage.items():
+        for path in stage["inputs"]:
+            if path in stage.get("external", []):
+                continue
+            if not any(_within(path, output) or _within(output, path) for other in dict_stage.values() for output in other["outputs"]):
+                raise ValueError(f"Input {path} of stage {name} is not an output of a stage, mark it external")
+
+def run_stage(name: str, stage: dict, dir_log: str) -> tuple:
+    """
+    run the script of a stage, its stdout and stderr go to {dir_log}/{name}.log.
+    returns:
+        : tuple, (return code, seconds).
+    """
+    os.makedirs(dir_log, exist_ok = True)
+    time_start = time.perf_counter()
+    with open(os.path.join(dir_log, f"{name}.log"), 'w', encoding = 'utf-8') as f_log:
+        process = subprocess.run([sys.executable, stage["script"]] + stage["args"], stdout = f_log, stderr = subprocess.STDOUT)
+    return process.returncode, time.perf_counter() - time_start
+
+def pipeline():
+
+    parser = argparse.ArgumentParser(description = "Running the pipeline stages whose inputs changed")
+
+    parser.add_argument('stages', type = str, nargs = '*', help = f'Stages to bring up to date with the stages they depend on (default: all of {list(STAGES)})')
+    parser.add_argument('--force', action = 'store_true', help = 'Rerun the selected stages even if their hashes are unchanged')
+    parser.add_argument('--jobs', type = int, default = 2, help = 'Stages run in parallel (default: 2)')
+    parser.add_argument('--dry_run', action = 'store_true', help = 'Print the stages that would run')
+    parser.add_argument('--state', type = str, default = "./logs/pipeline/state.json", help = 'State of the last runs (default: "./logs/pipeline/state.json")')
+    parser.add_argument('--dir_log', type = str, default = "./logs/pipeline/", help = 'Directory of the stage logs and timings (default: "./logs/pipeline/")')
+
+    args = parser.parse_args()
+
+    for name in args.stages:
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}, expected one of {list(STAGES)}")
+
+    check_inputs(STAGES)
+    dict_dependency = dependencies(STAGES)
+    list_order = order(dict_dependency)
+    set_selected = set(args.stages or STAGES)
+    set_forced = set(args.stages or STAGES) if args.force else set()
+    stack = list(set_selected)
+    while stack: # the stages a selected stage depends on are brought up to date too
+        for name in dict_dependency[stack.pop()]:
+            if name not in set_selected:
+                set_selected.add(name)
+                stack.append(name)
+
+    state = {"stages": {}, "hashes": {}}
+    if os.path.exists(args.state):
+        with open(args.state, 'r', encoding = 'utf-8') as f:
+            state = json.load(f)
+    hasher = Hasher(state.get("hashes"))
+
+    def save_state():
+        state["hashes"] = hasher.dict_cache
+        write_json(state, args.state, policy = "overwrite")
+
+    dict_status = {} # stage to "skipped", "done", "failed" or "blocked"
+    dict_hash = {}
+    running = {}
+    # a dry run runs no stage, so it writes no timing, log or state
+    writer_timing = nullcontext() if args.dry_run else Writer(os.path.join(args.dir_log, "timing.jsonl"), append = True)
+    with ThreadPoolExecutor(max_workers = max(args.jobs, 1)) as executor, writer_timing:
+        while len(dict_status) < len(set_selected):
+            for name in list_order:
+                if name not in set_selected or name in dict_status or name in running:
+                    continue
+                deps = dict_dependency[name] & set_selected
+                if any(dict_status.get(dep) in ("failed", "blocked") for dep in deps):
+                    dict_status[name] = "blocked"
+                    print(f"[{name}] blocked by a failed stage")
+                    continue
+                if not all(dict_status.get(dep) in ("skipped", "done") for dep in deps):
+                    continue
+                stage = STAGES[name]
+                list_missing = [path for path in stage.get("external", []) if not os.path.exists(path)]
+                if list_missing:
+                    dict_status[name] = "blocked"
+                    print(f"[{name}] blocked by missing external inputs: {list_missing}")
+                    continue
+                dict_hash[name] = hasher.stage(stage)
+                fresh = (
+                    name not in set_forced
+                    and not (args.dry_run and any(dict_status.get(dep) == "done" for dep in deps)) # inputs not rebuilt in a dry run
+                    and state["stages"].get(name, {}).get("hash") == dict_hash[name]
+                    and all(any(os.path.exists(path) for path in expand(output)) for output in stage["outputs"])
+                )
+                if fresh:
+                    dict_status[name] = "skipped"
+                    print(f"[{name}] up to date")
+                    continue
+                if args.dry_run:
+                    dict_status[name] = "done"
+                    print(f"[{name}] would run: python {stage['script']} {' '.join(stage['args'])}")
+                    continue
+                print(f"[{name}] running, log: {os.path.join(args.dir_log, name + '.log')}")
+                remove_outputs(stage)
+                running[name] = executor.submit(run_stage, name, stage, args.dir_log)
+            if not running:
+                continue
+            done, _ = wait(running.values(), return_when = FIRST_COMPLETED)
+            for name in [name for name, future in running.items() if future in done]:
+                returncode, seconds = running.pop(name).result()
+                dict_status[name] = "done" if returncode == 0 else "failed"
+                print(f"[{name}] {dict_status[name]} in {seconds:.1f} s" + (f", exit code {returncode}" if returncode else ""))
+                writer_timing.write({
+                    "stage": name,
+                    "status": dict_status[name],
+                    "seconds": round(seconds, 3),
+                    "finished": datetime.now().isoformat(timespec = "seconds")
+                })
+                if returncode == 0:
+                    # hash of the inputs when the stage started, an input changed during the run is seen as a change next time
+                    state["stages"][name] = {"hash": dict_hash[name], "seconds": round(seconds, 3), "finished": datetime.now().isoformat(timespec = "seconds")}
+                else:
+                    state["stages"].pop(name, None)
+                save_state()
+    if not args.dry_run:
+        save_state()
+
+    list_failed = [name for name in list_order if dict_status.get(name) in ("failed", "blocked")]
+    if list_failed:
+        print(f"Failed or blocked stages: {list_failed}", file = sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    pipeline()
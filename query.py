@@ -0,0 +1,129 @@
+import sys
+import json
+import argparse
+
+from utility import write_output, export_full, LawIndex, CaseGraph, JsonlIndex, JidSetStore
+
+def _emit(list_jid: list, output_path: str = None):
+    """
+    print JIDs one per line, or write them to output_path.
+    """
+    if output_path:
+        write_output(list_jid, output_path)
+    else:
+        sys.stdout.write("".join(f"{jid}\n" for jid in list_jid))
+    print(f"Total JIDs: {len(list_jid)}", file = sys.stderr)
+
+def query_law(args):
+    """
+    provision query over the related_law inverted index, e.g., '勞動基準法:55 | 勞動基準法:84.2'.
+    """
+    law_index = LawIndex.load_or_build(args.index, args.source)
+    _emit(sorted(law_index.query(args.expression)), args.output)
+
+def query_chain(args):
+    """
+    chain queries over the appeal graph, one chain per line as "JID -> JID -> ...".
+    """
+    graph = CaseGraph.load_or_build(args.graph, args.source)
+    if args.jid:
+        chain = graph.chain(args.jid)
+        list_chain = [chain] if chain else []
+    elif args.ending:
+        list_chain = graph.chains_ending_at(args.ending)
+    else:
+        list_chain = graph.chains_through(args.through)
+    list_line = [" -> ".join(chain) for chain in list_chain]
+    if args.output:
+        write_output(list_line, args.output)
+    else:
+        sys.stdout.write("".join(f"{line}\n" for line in list_line))
+    print(f"Total chains: {len(list_line)}", file = sys.stderr)
+
+def query_full(args):
+    """
+    compatibility export of a history JSONL, normalized or compact, to the full form with every URL.
+    """
+    export_full(args.input, args.output)
+
+def query_lookup(args):
+    """
+    point lookup of JIDs through the sidecar offset index of a JSONL, one record per line.
+    """
+    list_record = []
+    with JsonlIndex.load_or_build(args.source) as index:
+        for jid in args.jid:
+            list_record.extend(index.get(jid))
+    if args.output:
+        write_output(list_record, args.output)
+    else:
+        sys.stdout.write("".join(json.dumps(record, ensure_ascii = False) + "\n" for record in list_record))
+    print(f"Total records: {len(list_record)}", file = sys.stderr)
+
+def query_set(args):
+    """
+    set algebra over the registered JID lists, e.g., 'threshold ∩ history_filtered − duplicate_JID'.
+    """
+    with JidSetStore(args.store) as store:
+        if args.register:
+            store.register(args.register, args.name)
+        if not args.no_refresh:
+            store.refresh()
+        if args.list:
+            for name, alias, count, file_path in store.lists():
+                print(f"{name}\t{alias or ''}\t{count}\t{file_path}")
+            return
+        if not args.expression:
+            if args.register:
+                return
+            raise ValueError("A set expression is required unless --list or --register is given")
+        _emit(store.query(args.expression), args.output)
+
+def query():
+
+    parser = argparse.ArgumentParser(description = "Querying the stores built by the pipeline")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    parser_law = subparsers.add_parser("law", help = "JIDs citing statutory provisions, AND/OR/NOT over 'law name:article' terms")
+    parser_law.add_argument('expression', type = str, help = 'e.g., "(勞動基準法:55 | 勞動基準法:84.2) & !勞動基準法施行細則:5"')
+    parser_law.add_argument('--index', type = str, default = "./unique/law_index.json", help = 'Path to the law index (default: "./unique/law_index.json")')
+    parser_law.add_argument('--source', type = str, default = "./appeal/all_history.jsonl", help = 'JSONL with related_law, used to (re)build the index (default: "./appeal/all_history.jsonl")')
+    parser_law.add_argument('--output', type = str, default = None, help = 'Write the JIDs to this file (default: stdout)')
+    parser_law.set_defaults(func = query_law)
+
+    parser_chain = subparsers.add_parser("chain", help = "Case chains of the appeal graph")
+    group_chain = parser_chain.add_mutually_exclusive_group(required = True)
+    group_chain.add_argument('--jid', type = str, help = 'Full chain of a JID')
+    group_chain.add_argument('--ending', type = str, help = 'Chains ending at a court code or level suffix, e.g., "SV" for the supreme court')
+    group_chain.add_argument('--through', type = str, help = 'Chains through a court code or level suffix, e.g., "TYDV"')
+    parser_chain.add_argument('--graph', type = str, default = "./links/retire/graph.json", help = 'Path to the appeal graph (default: "./links/retire/graph.json")')
+    parser_chain.add_argument('--source', type = str, default = "./links/retire/link_filtered.jsonl", help = 'JSONL with history, used to (re)build the graph (default: "./links/retire/link_filtered.jsonl")')
+    parser_chain.add_argument('--output', type = str, default = None, help = 'Write the chains to this file (default: stdout)')
+    parser_chain.set_defaults(func = query_chain)
+
+    parser_lookup = subparsers.add_parser("lookup", help = "Records of JIDs in a JSONL, read through its offset index ({source}.idx.json)")
+    parser_lookup.add_argument('jid', type = str, nargs = '+', help = 'JIDs to look up')
+    parser_lookup.add_argument('--source', type = str, default = "./links/retire/link_filtered.jsonl", help = 'Uncompressed JSONL with JID (default: "./links/retire/link_filtered.jsonl")')
+    parser_lookup.add_argument('--output', type = str, default = None, help = 'Write the records to this JSONL (default: stdout)')
+    parser_lookup.set_defaults(func = query_lookup)
+
+    parser_set = subparsers.add_parser("set", help = "Set algebra over the JID lists of logs/ and lists/, & | - ! or ∩ ∪ − ¬")
+    parser_set.add_argument('expression', type = str, nargs = '?', default = None, help = 'e.g., "threshold ∩ history_filtered − duplicate_JID − file_list_wo_retire − file_list_wo_basis"')
+    parser_set.add_argument('--store', type = str, default = "./lists/jidset.sqlite", help = 'Path to the JID set store (default: "./lists/jidset.sqlite")')
+    parser_set.add_argument('--register', type = str, default = None, help = 'Register a .txt list from elsewhere, e.g., "./temp/file_99.txt"')
+    parser_set.add_argument('--name', type = str, default = None, help = 'Name of the list given by --register, e.g., "threshold" (default: its path)')
+    parser_set.add_argument('--list', action = 'store_true', help = 'Print the registered lists: name, alias, count and path')
+    parser_set.add_argument('--no_refresh', action = 'store_true', help = 'Skip rescanning logs/ and lists/ for new and changed lists')
+    parser_set.add_argument('--output', type = str, default = None, help = 'Write the JIDs to this file (default: stdout)')
+    parser_set.set_defaults(func = query_set)
+
+    parser_full = subparsers.add_parser("full", help = "Export a history JSONL in the full form, each record with its history and URLs")
+    parser_full.add_argument('input', type = str, help = 'History JSONL, e.g., "./appeal/all_history.jsonl"')
+    parser_full.add_argument('output', type = str, help = 'Output JSONL in the full form')
+    parser_full.set_defaults(func = query_full)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    query()
@@ -3,9 +3,4 @@
 python -m venv .venv
 . .venv/bin/activate
 pip install -r requirements.txt
-python filter.py
-python appeal.py
-python unique.py
-python link.py
-python analyze.py
-python extract.py
\ No newline at end of file
+python pipeline.py --jobs 2 # filter, appeal, unique, link, analyze and extract, see STAGES in pipeline.py
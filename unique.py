@@ -1,6 +1,6 @@
 import os
 
-from utility import reader_json, write_output
+from utility import iter_json, write_output, write_history, chain_key, LawIndex, JsonlIndex, parse_jid
 
 def unique():
 
@@ -17,6 +17,7 @@ def unique():
         "勞動基準法": ["55", "84.2"],
         "勞動基準法施行細則": ["5"]
     }
+    path_law_index = './unique/law_index.json' # rebuilt when all_history.jsonl changes, names and articles are matched NFKC normalized, see ./logs/readme.md
     output_path_filtered = f'./unique/filtered_history.jsonl'
     output_path_files_flitered = f'./logs/unique/history_filtered.txt'
     output_path_wo_relevant = f'./logs/unique/history_wo_relevant.txt'
@@ -31,52 +32,44 @@ def unique():
     """
     step 1. filtering out cases with specific statutory provisions
     """
-    list_history_keep = []
-    list_JID_keep = []
+    set_history_keep = set() # chain keys of history
+    set_JID_keep = set()
     list_history_filtered = []
     list_files_filtered = []
     list_files_wo_relevant = []
+    count_history_all = 0
 
-    list_history_all = reader_json(path_history_all)
+    law_index = LawIndex.load_or_build(path_law_index, path_history_all)
+    set_JID_relevant = law_index.query_provisions(specific_statutory_provisions)
 
-    for judgment in list_history_all:
+    # all_history.jsonl is streamed once per pass instead of kept in memory, chain keys agree between passes over the same file
+    for judgment in iter_json(path_history_all, fields = ["JID", "history"]):
         JID = judgment["JID"]
-        related_law = judgment["related_law"]
         history = judgment["history"]
-        pointer_relevant = False
-        for law in related_law:
-            law_name = law["law_name"]
-            law_no = law["law_no"].split("、")
-            if pointer_relevant:
-                break
-            if law_name in specific_statutory_provisions.keys():
-                list_no_specific = specific_statutory_provisions[law_name]
-                for no_specific in list_no_specific:
-                    if no_specific in law_no:
-                        pointer_relevant = True
-                        break
+        count_history_all += 1
+        pointer_relevant = JID in set_JID_relevant
         if pointer_relevant:
-            if history and history not in list_history_keep:
-                list_history_keep.append(history)
-            if not history:
-                list_JID_keep.append(JID)
+            if history:
+                set_history_keep.add(chain_key(history))
+            else:
+                set_JID_keep.add(JID)
     
-    for judgment in list_history_all:
+    for judgment in iter_json(path_history_all):
         JID = judgment["JID"]
         history = judgment["history"]
         if not history:
-            if JID in list_JID_keep:
+            if JID in set_JID_keep:
                 list_files_filtered.append(JID)
                 list_history_filtered.append(judgment)
             else:
                 list_files_wo_relevant.append(JID)
         else:
-            if history in list_history_keep:
+            if chain_key(history) in set_history_keep:
                 list_files_filtered.append(JID)
                 list_history_filtered.append(judgment)
             else:
                 list_files_wo_relevant.append(JID)
-    write_output(list_history_filtered, output_path_filtered)
+    write_history(list_history_filtered, output_path_filtered)
     write_output(list_files_filtered, output_path_files_flitered)
     write_output(list_files_wo_relevant, output_path_wo_relevant)
 
@@ -84,19 +77,17 @@ def unique():
     step 2. removing duplicates
     """
     list_unique_output = []
-    list_unique_history = []
+    set_unique_history = set() # chain keys of history
     list_unique_JID = []
-    list_unique_JID_wo_version = []
-    list_duplicate_JID_wo_version = []
+    set_unique_JID_wo_version = set()
+    set_duplicate_JID_wo_version = set()
     list_duplicate_JID = []
 
-    list_history_filtered = reader_json(output_path_filtered)
-
-    for instance_json in list_history_all:
+    for instance_json in iter_json(path_history_all):
         JID = instance_json["JID"]
         history = instance_json["history"]
         related_law = instance_json["related_law"]
-        JID_wo_version = ",".join(JID.split(",")[:5])
+        JID_wo_version = parse_jid(JID).without_version
         if not history:
             list_unique_JID.append(JID)
             list_unique_output.append({
@@ -105,8 +96,9 @@ def unique():
                 "related_law": related_law
             })
         else:        
-            if history not in list_unique_history:
-                list_unique_history.append(history)
+            key = chain_key(history)
+            if key not in set_unique_history:
+                set_unique_history.add(key)
                 list_unique_JID.append(JID)
                 list_unique_output.append({
                     "JID": JID,
@@ -114,24 +106,25 @@ def unique():
                     "related_law": related_law
                 })
 
-        if JID_wo_version not in list_unique_JID_wo_version:
-            list_unique_JID_wo_version.append(JID_wo_version)
+        if JID_wo_version not in set_unique_JID_wo_version:
+            set_unique_JID_wo_version.add(JID_wo_version)
         else:
-            list_duplicate_JID_wo_version.append(JID_wo_version)
+            set_duplicate_JID_wo_version.add(JID_wo_version)
 
-    for instance_json in list_history_filtered:
+    for instance_json in iter_json(output_path_filtered, fields = ["JID"]):
         JID = instance_json["JID"]
-        JID_wo_version = ",".join(JID.split(",")[:5])
-        if JID_wo_version in list_duplicate_JID_wo_version:
+        JID_wo_version = parse_jid(JID).without_version
+        if JID_wo_version in set_duplicate_JID_wo_version:
             list_duplicate_JID.append(JID)
-    write_output(list_unique_output, output_path_unique)
+    write_history(list_unique_output, output_path_unique, normalize = False) # histories are distinct here, nothing to share
+    JsonlIndex.load_or_build(output_path_unique) # offset index for point lookups, see query.py lookup
     write_output(list_unique_JID, output_path_unique_file)
     write_output(list_duplicate_JID, output_path_duplicate_file)
 
     """
     step 3. dataset size description
     """
-    print(f"Total cases processed: {len(list_history_all)}")
+    print(f"Total cases processed: {count_history_all}")
     print(f"Total unique cases after filtering out specific statutory provisions: {len(list_history_filtered)}")
     print(f"Total unique cases after deduplication of history: {len(list_unique_output)}")
     print(f"Total duplicate cases having same JID without version: {len(list_duplicate_JID)}")
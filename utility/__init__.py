@@ -1,5 +1,34 @@
-from .writer import write_output, write_json
-from .reader import reader_txt, reader_json
-from .crawler import get_html, get_query, get_content, get_head
+import importlib
 
-__all__ = ["write_output", "write_json", "reader_txt", "reader_json", "get_html", "get_query", "get_content", "get_head"]
\ No newline at end of file
+# name to submodule, a submodule is imported on the first access of one of its names (PEP 562),
+# so offline stages and queries do not load requests and bs4 (crawler) or numpy (analytics)
+_EXPORTS = {
+    "writer": ["Writer", "write_output", "write_json"],
+    "codec": ["open_text", "codec_of", "strip_codec"],
+    "reader": ["reader_txt", "reader_json", "iter_json", "get_decoder"],
+    "crawler": ["get_html", "get_query", "get_content", "get_head", "Throttle"],
+    "profiler": ["Profiler"],
+    "law_index": ["LawIndex"],
+    "graph": ["CaseGraph"],
+    "analytics": ["ChainAnalytics"],
+    "history": ["History", "HistoryWriter", "write_history", "export_full", "derive_links", "fingerprint_history", "chain_key"],
+    "offset_index": ["JsonlIndex"],
+    "court": ["resolve_court", "court_from_code", "court_from_text"],
+    "jid": ["JID", "parse_jid", "jid_of_file"],
+    "loader": ["list_directory", "load_files", "load_directory"],
+    "jidset": ["JidSetStore"],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = [name for names in _EXPORTS.values() for name in names]
+
+def __getattr__(name: str):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value # later accesses skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
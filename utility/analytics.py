@@ -0,0 +1,214 @@
+import os
+import csv
+
+import numpy as np
+
+from .jid import parse_jid
+from .writer import Writer, write_json
+
+LEVELS = ("overall", "detail")
+
+class _Encoder:
+    """
+    encode the chains of a level, "_" joined court names, to court ids.
+    each distinct chain is kept once, its courts are codes[offsets[i]:offsets[i + 1]].
+    """
+    def __init__(self):
+        self.dict_court = {}
+        self.list_court = []
+        self.dict_chain = {}
+        self.list_chain = []
+        self.codes = []
+        self.offsets = [0]
+        self.chain_ids = []
+
+    def add(self, link: str):
+        id_chain = self.dict_chain.get(link)
+        if id_chain is None:
+            id_chain = self.dict_chain[link] = len(self.list_chain)
+            self.list_chain.append(link)
+            for court in link.split("_"):
+                id_court = self.dict_court.get(court)
+                if id_court is None:
+                    id_court = self.dict_court[court] = len(self.list_court)
+                    self.list_court.append(court)
+                self.codes.append(id_court)
+            self.offsets.append(len(self.codes))
+        self.chain_ids.append(id_chain)
+
+class ChainAnalytics:
+    """
+    analytics of the linked chains of link.py, computed in one pass over the judgments.
+    per level ("overall" for court levels, "detail" for courts), the tables are:
+        frequency: distinct chains by count.
+        length: distinct chains by the characters of the chain, the order of the analyze_*_length tables of link.py,
+            with the number of courts of each chain as a column of {level}_length.csv.
+        length distribution: number of chains per chain length.
+        transition: court to court counts of consecutive judgments in the chains.
+        year: per year (ROC, from the JID) number of chains, mean and max length, and court counts.
+    usage:
+        analytics = ChainAnalytics.build(list_judgments)
+        analytics.frequency("overall")
+        analytics.save("./links/retire/analytics_filtered/")
+    """
+    def __init__(self, count_chain: int, dict_table: dict):
+        self.count_chain = count_chain
+        self.dict_table = dict_table
+
+    @classmethod
+    def build(cls, list_judgments):
+        """
+        args:
+            list_judgments: iterable of dict, judgments with keys JID, link_overall and link_detail, e.g., a projection of iter_json.
+        returns:
+            analytics: ChainAnalytics.
+        """
+        dict_encoder = {level: _Encoder() for level in LEVELS}
+        list_year = []
+        for judgment in list_judgments:
+            list_year.append(parse_jid(judgment["JID"]).year) # ROC year, -1 if it has no year
+            for level in LEVELS:
+                dict_encoder[level].add(judgment[f"link_{level}"])
+        years = np.array(list_year, dtype = np.int64)
+        dict_table = {level: _tabulate(encoder, years) for level, encoder in dict_encoder.items()}
+        return cls(len(list_year), dict_table)
+
+    def frequency(self, level: str) -> list:
+        """
+        returns:
+            list_link: list, (chain, count) by count, ties in first-seen order.
+        """
+        table = self.dict_table[level]
+        order = np.argsort(-table["count"], kind = "stable")
+        return [(table["chains"][i], int(table["count"][i])) for i in order]
+
+    def _order_length(self, level: str) -> np.ndarray:
+        table = self.dict_table[level]
+        characters = np.array([len(link) for link in table["chains"]], dtype = np.int64)
+        return np.argsort(-characters, kind = "stable")
+
+    def by_length(self, level: str) -> list:
+        """
+        returns:
+            list_link: list, (chain, count) by characters of the chain, ties in first-seen order.
+        """
+        table = self.dict_table[level]
+        return [(table["chains"][i], int(table["count"][i])) for i in self._order_length(level)]
+
+    def to_dict(self) -> dict:
+        dict_output = {"chains": self.count_chain}
+        for level, table in self.dict_table.items():
+            courts = table["courts"]
+            dict_output[level] = {
+                "courts": courts,
+                "frequency": [[link, count] for link, count in self.frequency(level)],
+                "length_distribution": {str(length): int(count) for length, count in enumerate(table["length_distribution"]) if count},
+                "transition": {
+                    courts[i]: {courts[j]: int(table["transition"][i, j]) for j in np.flatnonzero(table["transition"][i])}
+                    for i in range(len(courts)) if table["transition"][i].any()
+                },
+                "year": [
+                    {
+                        "year": int(year),
+                        "chains": int(table["year_chains"][i]),
+                        "mean_length": float(table["year_mean_length"][i]),
+                        "max_length": int(table["year_max_length"][i]),
+                        "courts": {courts[j]: int(table["year_court"][i, j]) for j in np.flatnonzero(table["year_court"][i])}
+                    }
+                    for i, year in enumerate(table["years"])
+                ]
+            }
+        return dict_output
+
+    def save(self, output_dir: str):
+        """
+        write analytics.json and the csv tables of each level to output_dir, existing files are kept.
+        """
+        write_json(self.to_dict(), os.path.join(output_dir, "analytics.json"))
+        for level, table in self.dict_table.items():
+            courts = table["courts"]
+            _write_csv(
+                ["chain", "length", "count"],
+                [[link, len(link.split("_")), count] for link, count in self.frequency(level)],
+                os.path.join(output_dir, f"{level}_frequency.csv")
+            )
+            _write_csv(
+                ["chain", "characters", "courts", "count"],
+                [[table["chains"][i], len(table["chains"][i]), int(table["length"][i]), int(table["count"][i])] for i in self._order_length(level)],
+                os.path.join(output_dir, f"{level}_length.csv")
+            )
+            _write_csv(
+                ["length", "count"],
+                [[length, int(count)] for length, count in enumerate(table["length_distribution"]) if count],
+                os.path.join(output_dir, f"{level}_length_distribution.csv")
+            )
+            _write_csv(
+                ["from \\ to"] + courts,
+                [[court] + table["transition"][i].tolist() for i, court in enumerate(courts)],
+                os.path.join(output_dir, f"{level}_transition.csv")
+            )
+            _write_csv(
+                ["year", "chains", "mean_length", "max_length"] + courts,
+                [
+                    [int(year), int(table["year_chains"][i]), round(float(table["year_mean_length"][i]), 4), int(table["year_max_length"][i])] + table["year_court"][i].tolist()
+                    for i, year in enumerate(table["years"])
+                ],
+                os.path.join(output_dir, f"{level}_year.csv")
+            )
+
+def _tabulate(encoder: _Encoder, years: np.ndarray) -> dict:
+    """
+    tables of a level, counts of the distinct chains are weighted instead of repeating each judgment.
+    """
+    count_court = len(encoder.list_court)
+    count_distinct = len(encoder.list_chain)
+    codes = np.array(encoder.codes, dtype = np.int64)
+    offsets = np.array(encoder.offsets, dtype = np.int64)
+    chain_ids = np.array(encoder.chain_ids, dtype = np.int64)
+
+    length = np.diff(offsets)
+    count = np.bincount(chain_ids, minlength = count_distinct)
+    length_judgment = length[chain_ids]
+
+    # consecutive courts within a distinct chain, weighted by the count of the chain
+    weight = np.repeat(count, length)
+    is_next = np.ones(len(codes), dtype = bool)
+    is_next[offsets[:-1]] = False # first court of a chain has no predecessor
+    index_next = np.flatnonzero(is_next)
+    transition = np.bincount(
+        codes[index_next - 1] * count_court + codes[index_next],
+        weights = weight[index_next],
+        minlength = count_court * count_court
+    ).reshape(count_court, count_court).astype(np.int64)
+
+    # court counts of each distinct chain, then summed per year of the judgments
+    chain_of_code = np.repeat(np.arange(count_distinct), length)
+    chain_court = np.bincount(chain_of_code * count_court + codes, minlength = count_distinct * count_court).reshape(count_distinct, count_court)
+    list_year, year_index = np.unique(years, return_inverse = True)
+    year_chains = np.bincount(year_index, minlength = len(list_year))
+    year_court = np.zeros((len(list_year), count_court), dtype = np.int64)
+    np.add.at(year_court, year_index, chain_court[chain_ids])
+    year_max_length = np.zeros(len(list_year), dtype = np.int64)
+    np.maximum.at(year_max_length, year_index, length_judgment)
+
+    return {
+        "courts": list(encoder.list_court),
+        "chains": list(encoder.list_chain),
+        "count": count,
+        "length": length,
+        "length_distribution": np.bincount(length_judgment) if len(length_judgment) else np.zeros(0, dtype = np.int64),
+        "transition": transition,
+        "years": list_year,
+        "year_chains": year_chains,
+        "year_mean_length": np.bincount(year_index, weights = length_judgment, minlength = len(list_year)) / np.maximum(year_chains, 1),
+        "year_max_length": year_max_length,
+        "year_court": year_court
+    }
+
+def _write_csv(list_header: list, list_row: list, output_path: str):
+    with Writer(output_path) as writer:
+        if writer.skipped:
+            return
+        writer_csv = csv.writer(writer.file, lineterminator = "\n")
+        writer_csv.writerow(list_header)
+        writer_csv.writerows(list_row)
@@ -0,0 +1,55 @@
+import io
+import gzip
+import lzma
+
+BUFFER_SIZE = 1 << 20
+GZIP_LEVEL = 6 # zlib default, level 9 is much slower for a few percent
+XZ_PRESET = 6
+
+def _open_gzip(file_path: str, mode: str):
+    return gzip.GzipFile(file_path, mode, compresslevel = GZIP_LEVEL)
+
+def _open_xz(file_path: str, mode: str):
+    return lzma.LZMAFile(file_path, mode, preset = None if mode.startswith('r') else XZ_PRESET)
+
+CODECS = {
+    ".gz": _open_gzip,
+    ".xz": _open_xz,
+}
+
+def codec_of(file_path: str) -> str:
+    """
+    args:
+        file_path: str, e.g., "./unique/unique_history.jsonl.gz".
+    returns:
+        suffix: str, ".gz" or ".xz", None for an uncompressed file.
+    """
+    for suffix in CODECS:
+        if file_path.endswith(suffix):
+            return suffix
+    return None
+
+def strip_codec(file_path: str) -> str:
+    """
+    path without the compression suffix, e.g., "a.jsonl.gz" to "a.jsonl", used to check the format suffix.
+    """
+    suffix = codec_of(file_path)
+    return file_path[:-len(suffix)] if suffix else file_path
+
+def open_text(file_path: str, mode: str = 'r', codec_path: str = None, buffer_size: int = BUFFER_SIZE):
+    """
+    open a text file, (de)compressed in a stream if the path ends with .gz or .xz.
+    args:
+        file_path: str, path to open.
+        mode: str, 'r', 'w' or 'a', appending to a compressed file adds a new stream, which readers concatenate.
+        codec_path: str, path that decides the codec, e.g., the final path of a temporary file, default is file_path.
+        buffer_size: int, size of the write and read buffer in bytes.
+    returns:
+        f: text file object, utf-8.
+    """
+    suffix = codec_of(codec_path or file_path)
+    if suffix is None:
+        return open(file_path, mode, encoding = 'utf-8', buffering = buffer_size)
+    f = CODECS[suffix](file_path, mode + 'b')
+    buffered = io.BufferedReader(f, buffer_size) if mode == 'r' else io.BufferedWriter(f, buffer_size)
+    return io.TextIOWrapper(buffered, encoding = 'utf-8')
@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+
+from .jid import parse_jid
+
+UNKNOWN_COURT = "Unknown Court"
+
+# court code of a JID to the court name in the history text, checked against the histories of links/link_filtered.jsonl
+COURT_DETAIL = {
+    "TPSV": "最高法院",
+    "TPHV": "高等法院",
+    "TCHV": "高等法院臺中分院",
+    "TNHV": "高等法院臺南分院",
+    "KSHV": "高等法院高雄分院",
+    "HLHV": "高等法院花蓮分院",
+    "KMHV": "福建高等法院金門分院",
+    "TPDV": "臺北地方法院",
+    "SLDV": "士林地方法院",
+    "PCDV": "新北地方法院",
+    "ILDV": "宜蘭地方法院",
+    "KLDV": "基隆地方法院",
+    "TYDV": "桃園地方法院",
+    "SCDV": "新竹地方法院",
+    "MLDV": "苗栗地方法院",
+    "TCDV": "臺中地方法院",
+    "CHDV": "彰化地方法院",
+    "NTDV": "南投地方法院",
+    "ULDV": "雲林地方法院",
+    "CYDV": "嘉義地方法院",
+    "TNDV": "臺南地方法院",
+    "KSDV": "高雄地方法院",
+    "CTDV": "橋頭地方法院",
+    "PTDV": "屏東地方法院",
+    "TTDV": "臺東地方法院",
+    "HLDV": "花蓮地方法院",
+    "KMDV": "福建金門地方法院",
+    "TPEV": "臺北簡易庭",
+    "NHEV": "內湖簡易庭",
+    "SLEV": "士林簡易庭",
+    "PCEV": "板橋簡易庭",
+    "SJEV": "三重簡易庭",
+    "STEV": "新店簡易庭",
+    "LTEV": "羅東簡易庭",
+    "TYEV": "桃園簡易庭",
+    "CLEV": "中壢簡易庭",
+    "TCEV": "臺中簡易庭",
+    "FYEV": "豐原簡易庭",
+    "SDEV": "沙鹿簡易庭",
+    "CHEV": "彰化簡易庭",
+    "OLEV": "員林簡易庭",
+    "PDEV": "北斗簡易庭",
+    "NTEV": "南投簡易庭(含埔里)",
+    "TLEV": "斗六簡易庭",
+    "CYEV": "嘉義簡易庭(含朴子)",
+    "TNEV": "臺南簡易庭",
+    "SSEV": "新市簡易庭",
+    "SYEV": "柳營簡易庭",
+    "KSEV": "高雄簡易庭",
+    "FSEV": "鳳山簡易庭",
+    "CDEV": "橋頭簡易庭",
+    "PTEV": "屏東簡易庭",
+    "TTEV": "臺東簡易庭",
+    "HLEV": "花蓮簡易庭(含玉里)",
+    "KMEV": "金城簡易庭",
+}
+
+# last two letters of a court code to the court level
+COURT_LEVEL = {
+    "SV": "最高法院",
+    "HV": "高等法院",
+    "DV": "地方法院",
+    "EV": "簡易庭",
+}
+
+PATTERN_DETAIL = re.compile(r"(?:臺灣|台灣)?(.{1,30}) \s*\d{2,3}\s*年") # notice space before \s*
+PATTERN_OVERALL = re.compile(r"(簡易庭|地方法院|高等法院|最高法院)[^0-9]{0,20}?\d{2,3}\s*年")
+
+@lru_cache(maxsize = 4096)
+def court_from_text(text: str) -> tuple:
+    """
+    court of a history entry from its text, e.g., "臺灣基隆地方法院 89 年度 勞訴 字第 1 號判決(89.02.25)".
+    args:
+        text: str, the text of the history.
+    returns:
+        : tuple, (court detail, court level), e.g., ("基隆地方法院", "地方法院"), both "Unknown Court" if not found.
+    """
+    match_detail = PATTERN_DETAIL.search(text)
+    match_overall = PATTERN_OVERALL.search(text)
+    if match_detail and match_overall:
+        return "".join(match_detail.group(1).split(" ")), match_overall.group(1)
+    print(f"Warning: No court found in text: {text}")
+    return UNKNOWN_COURT, UNKNOWN_COURT
+
+def court_from_code(code: str) -> tuple:
+    """
+    args:
+        code: str, court code of a JID, e.g., "TPHV".
+    returns:
+        : tuple, (court detail, court level), None if the code is not in the table.
+    """
+    detail = COURT_DETAIL.get(code)
+    if detail is None:
+        return None
+    return detail, COURT_LEVEL[code[-2:]]
+
+def resolve_court(history: dict) -> tuple:
+    """
+    court of a history entry, from the court code of its JID, or from its text if it has no JID or the code is unknown.
+    args:
+        history: dict, a history entry with keys text and link2json.
+    returns:
+        : tuple, (court detail, court level), e.g., ("高等法院臺中分院", "高等法院").
+    """
+    jid = history.get("link2json")
+    if jid:
+        court = court_from_code(parse_jid(jid).court)
+        if court:
+            return court
+    return court_from_text(history.get("text") or "")
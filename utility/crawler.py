@@ -1,4 +1,6 @@
 import re
+import time
+import threading
 import urllib.parse
 import requests
 
@@ -90,4 +92,26 @@ def get_head(soup: BeautifulSoup, class_name_first: str, class_name_next: str, p
         if re.search(pattern, text):
             td = label.find_next_sibling("div", class_ = class_name_next)
             return td.get_text(strip = True) if td else ""
-    return ""
\ No newline at end of file
+    return ""
+
+class Throttle:
+    """
+    rate limit shared by the threads of a pool, every `every` requests all threads pause for `seconds`.
+    the pause is taken while holding the lock, so no thread starts a request until it ends.
+    usage:
+        throttle = Throttle()
+        def worker(jid):
+            throttle.wait()
+            return get_html(jid)
+    """
+    def __init__(self, every: int = 30, seconds: float = 2.0):
+        self.every = every
+        self.seconds = seconds
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            self.count += 1
+            if self.count % self.every == 0:
+                time.sleep(self.seconds)
@@ -0,0 +1,221 @@
+import os
+import json
+from array import array
+
+from .jid import parse_jid
+from .reader import iter_json
+
+def court_of(node: str) -> str:
+    """
+    court code of a node, e.g., "TPSV" of "TPSV,86,台上,3557,19971127", empty for a history entry without JID.
+    """
+    return parse_jid(node).court
+
+def _match_court(code: str, court: str) -> bool:
+    """
+    a court is a full code, e.g., "TYDV", or a suffix for a level, e.g., "SV" for the supreme court.
+    """
+    return bool(code) and (code == court or code.endswith(court))
+
+class CaseGraph:
+    """
+    appeal graph, nodes are JIDs (or the text of a history entry without JID), history order gives directed edges.
+    stored as compact adjacency arrays (CSR): the targets of node i are targets[offsets[i]:offsets[i + 1]].
+    connected components come from union-find, each component is one case chain.
+    """
+    def __init__(self, list_node: list, offsets: array, targets: array, component: array, source: dict = None):
+        self.list_node = list_node
+        self.offsets = offsets
+        self.targets = targets
+        self.component = component
+        self.source = source or {}
+        self.dict_id = {node: index for index, node in enumerate(list_node)}
+        self._build_lookup()
+
+    def _build_lookup(self):
+        """
+        component members and court code to components, so queries are lookups.
+        """
+        self.dict_member = {}
+        self.dict_court = {} # court code to components with a node of the court
+        self.dict_court_end = {} # court code to components with a sink node of the court
+        for index, node in enumerate(self.list_node):
+            id_component = self.component[index]
+            self.dict_member.setdefault(id_component, []).append(index)
+            code = court_of(node)
+            if not code:
+                continue
+            self.dict_court.setdefault(code, set()).add(id_component)
+            if self.offsets[index] == self.offsets[index + 1]:
+                self.dict_court_end.setdefault(code, set()).add(id_component)
+
+    @classmethod
+    def build(cls, judgments, source: dict = None):
+        """
+        args:
+            judgments: iterable of dict, with keys JID and history.
+            source: dict, size and mtime of the source file, used to detect a stale graph.
+        returns:
+            graph: CaseGraph.
+        """
+        list_node = []
+        dict_id = {}
+        set_edge = set()
+        parent = array('I')
+        size = array('I')
+
+        def node_id(node: str) -> int:
+            if node not in dict_id:
+                dict_id[node] = len(list_node)
+                list_node.append(node)
+                parent.append(len(parent))
+                size.append(1)
+            return dict_id[node]
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        def union(a: int, b: int):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                return
+            if size[root_a] < size[root_b]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+            size[root_a] += size[root_b]
+
+        for judgment in judgments:
+            list_id = [node_id(history.get("link2json") or history["text"]) for history in judgment["history"]]
+            for source_id, target_id in zip(list_id, list_id[1:]):
+                if source_id != target_id:
+                    set_edge.add((source_id, target_id))
+                union(source_id, target_id)
+            id_judgment = node_id(judgment["JID"])
+            if list_id:
+                union(id_judgment, list_id[0])
+
+        offsets = array('I', [0] * (len(list_node) + 1))
+        for source_id, _ in set_edge:
+            offsets[source_id + 1] += 1
+        for index in range(len(list_node)):
+            offsets[index + 1] += offsets[index]
+        targets = array('I', [0] * len(set_edge))
+        position = array('I', offsets[:-1])
+        for source_id, target_id in sorted(set_edge):
+            targets[position[source_id]] = target_id
+            position[source_id] += 1
+
+        dict_root = {}
+        component = array('I', [0] * len(list_node))
+        for index in range(len(list_node)):
+            component[index] = dict_root.setdefault(find(index), len(dict_root))
+        return cls(list_node, offsets, targets, component, source)
+
+    @staticmethod
+    def stat_source(path_source: str) -> dict:
+        stat = os.stat(path_source)
+        return {"path": path_source, "size": stat.st_size, "mtime": stat.st_mtime}
+
+    @classmethod
+    def load(cls, path_graph: str):
+        with open(path_graph, 'r', encoding = 'utf-8') as f:
+            data = json.load(f)
+        return cls(data["nodes"], array('I', data["offsets"]), array('I', data["targets"]), array('I', data["component"]), data.get("source"))
+
+    def save(self, path_graph: str):
+        output_diretory = os.path.dirname(path_graph)
+        if output_diretory and not os.path.exists(output_diretory):
+            os.makedirs(output_diretory)
+        with open(path_graph, 'w', encoding = 'utf-8') as f:
+            json.dump({
+                "source": self.source,
+                "nodes": self.list_node,
+                "offsets": self.offsets.tolist(),
+                "targets": self.targets.tolist(),
+                "component": self.component.tolist()
+            }, f, ensure_ascii = False)
+
+    @classmethod
+    def load_or_build(cls, path_graph: str, path_source: str, reader = None):
+        """
+        load the graph, rebuild and save it if it is missing or its source file changed.
+        args:
+            path_graph: str, path to the graph json.
+            path_source: str, path to the JSONL with JID and history, e.g., "./links/link_filtered.jsonl".
+            reader: callable, path to iterable of judgments, default reads the JSONL lazily, see reader.iter_json.
+        returns:
+            graph: CaseGraph.
+        """
+        source = cls.stat_source(path_source)
+        if os.path.exists(path_graph):
+            graph = cls.load(path_graph)
+            if graph.source.get("size") == source["size"] and graph.source.get("mtime") == source["mtime"]:
+                return graph
+        judgments = reader(path_source) if reader else iter_json(path_source, fields = ["JID", "history"])
+        graph = cls.build(judgments, source)
+        graph.save(path_graph)
+        return graph
+
+    def successors(self, node: str) -> list:
+        index = self.dict_id[node]
+        return [self.list_node[target] for target in self.targets[self.offsets[index]:self.offsets[index + 1]]]
+
+    def _ordered(self, id_component: int) -> list:
+        """
+        nodes of a component in topological order, ties broken by first-seen order.
+        """
+        list_member = self.dict_member[id_component]
+        indegree = {index: 0 for index in list_member}
+        for index in list_member:
+            for target in self.targets[self.offsets[index]:self.offsets[index + 1]]:
+                indegree[target] += 1
+        list_ready = [index for index in list_member if indegree[index] == 0]
+        list_order = []
+        while list_ready:
+            index = min(list_ready)
+            list_ready.remove(index)
+            list_order.append(index)
+            for target in self.targets[self.offsets[index]:self.offsets[index + 1]]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    list_ready.append(target)
+        if len(list_order) < len(list_member): # cycle, keep the remaining nodes in first-seen order
+            set_order = set(list_order)
+            list_order.extend(index for index in list_member if index not in set_order)
+        return [self.list_node[index] for index in list_order]
+
+    def chain(self, jid: str) -> list:
+        """
+        args:
+            jid: str, JID of any judgment in the chain.
+        returns:
+            list_node: list, the full chain in appeal order, empty if the JID is unknown.
+        """
+        if jid not in self.dict_id:
+            return []
+        return self._ordered(self.component[self.dict_id[jid]])
+
+    def _components(self, dict_court: dict, court: str) -> list:
+        set_component = set()
+        for code, components in dict_court.items():
+            if _match_court(code, court):
+                set_component |= components
+        return [self._ordered(id_component) for id_component in sorted(set_component)]
+
+    def chains_ending_at(self, court: str) -> list:
+        """
+        chains with a last judgment of the court, e.g., "SV" for the supreme court.
+        """
+        return self._components(self.dict_court_end, court)
+
+    def chains_through(self, court: str) -> list:
+        """
+        chains with any judgment of the court, e.g., "TYDV".
+        """
+        return self._components(self.dict_court, court)
+
+    def count_components(self) -> int:
+        return len(self.dict_member)
@@ -0,0 +1,176 @@
+import re
+import json
+import urllib.parse
+
+from .codec import open_text
+from .writer import Writer
+
+PATTERN_CHAIN = re.compile(r'\{"chain": (\d+), "history": ')
+PATTERN_ESCAPE = re.compile(r'%[0-9A-F]{2}')
+
+URL_JUDICIAL = "https://judgment.judicial.gov.tw/FJUD/data.aspx?ty=JD&id="
+URL_KEYS = ("link", "link2web")
+
+def derive_links(jid: str) -> tuple:
+    """
+    URLs of a history entry from its JID, as given by the judicial website, see appeal.get_dict_history.
+    link escapes as encodeURIComponent with lowercase hex, e.g., "KLDV%2c89%2c%e5%8b%9e%e8%a8%b4%2c1%2c20000225".
+    args:
+        jid: str, link2json of the entry, None if the entry has no JID.
+    returns:
+        : tuple, (link, link2web), both None if jid is None.
+    """
+    if not jid:
+        return None, None
+    url_jid = PATTERN_ESCAPE.sub(lambda match: match.group(0).lower(), urllib.parse.quote(jid, safe = "!*'()"))
+    return URL_JUDICIAL + url_jid, URL_JUDICIAL + jid
+
+def compact_entry(entry: dict) -> dict:
+    """
+    history entry without the URLs that derive_links gives back, URLs that differ are kept.
+    """
+    if not any(key in entry for key in URL_KEYS):
+        return entry
+    link, link2web = derive_links(entry.get("link2json"))
+    if entry.get("link") != link or entry.get("link2web") != link2web:
+        return entry
+    return {key: value for key, value in entry.items() if key not in URL_KEYS}
+
+def expand_entry(entry: dict) -> dict:
+    """
+    history entry in the full form, keys text, link, link2json, link2web, then the others, e.g., int_case.
+    """
+    if "link" in entry:
+        return entry
+    link, link2web = derive_links(entry.get("link2json"))
+    dict_entry = {"text": entry.get("text"), "link": link, "link2json": entry.get("link2json"), "link2web": link2web}
+    dict_entry.update(entry)
+    return dict_entry
+
+class History(list):
+    """
+    history chain read from a normalized file, the records of the same chain share one History.
+    chain is the id of the chain in the file, so two chains of a file are equal if and only if their ids are equal.
+    """
+    __slots__ = ("chain",)
+
+    def __init__(self, history: list, chain: int):
+        super().__init__(history)
+        self.chain = chain
+
+def fingerprint_history(history: list) -> tuple:
+    """
+    canonical and hashable form of a history chain, two chains are equal if and only if their fingerprints are equal.
+    args:
+        history: list, history entries with keys text, link, link2json, link2web.
+    returns:
+        fingerprint: tuple, ordered tuple of the sorted items of each entry.
+    """
+    return tuple(tuple(sorted(entry.items())) for entry in history)
+
+def chain_key(history: list):
+    """
+    hashable key of a history chain, the chain id if it was read from a normalized file, else its fingerprint.
+    keys are only comparable between chains read from the same file.
+    """
+    return history.chain if isinstance(history, History) else fingerprint_history(history)
+
+class HistoryWriter:
+    """
+    write judgments to a normalized JSONL, each distinct history chain is written once as
+        {"chain": id, "history": [...]}
+    before the first record referring to it, and the record stores the id, e.g., {"JID": ..., "history": id}.
+    empty histories are kept as [].
+    entries are written in the compact form without link and link2web (see compact_entry), readers derive them again.
+    with normalize = False the history of each record is written in the record, e.g., when the chains are distinct.
+    usage:
+        with Writer(output_path, policy = "overwrite") as writer:
+            history_writer = HistoryWriter(writer.file)
+            for judgment in list_judgments:
+                history_writer.write(judgment)
+    """
+    def __init__(self, f, normalize: bool = True, compact: bool = True):
+        self.f = f
+        self.normalize = normalize
+        self.compact = compact
+        self.dict_chain = {} # fingerprint to chain id
+        self.dict_object = {} # id() of a written history to (history, chain id), records often share one list
+
+    def _chain(self, history: list) -> int:
+        cached = self.dict_object.get(id(history))
+        if cached is not None and cached[0] is history:
+            return cached[1]
+        fingerprint = fingerprint_history(history)
+        chain = self.dict_chain.get(fingerprint)
+        if chain is None:
+            chain = self.dict_chain[fingerprint] = len(self.dict_chain)
+            self.f.write(json.dumps({"chain": chain, "history": self._entries(history)}, ensure_ascii = False) + "\n")
+        self.dict_object[id(history)] = (history, chain)
+        return chain
+
+    def _entries(self, history: list) -> list:
+        return [compact_entry(entry) for entry in history] if self.compact else history
+
+    def write(self, judgment: dict):
+        history = judgment.get("history")
+        if history:
+            judgment = {**judgment, "history": self._chain(history) if self.normalize else self._entries(history)}
+        self.f.write(json.dumps(judgment, ensure_ascii = False) + "\n")
+
+def write_history(list_judgments: list, output_path: str, normalize: bool = True, compact: bool = True, policy: str = "skip"):
+    """
+    write judgments with history, see HistoryWriter, and Writer for the policy of an existing file.
+    """
+    with Writer(output_path, policy) as writer:
+        if writer.skipped:
+            return
+        history_writer = HistoryWriter(writer.file, normalize, compact)
+        for judgment in list_judgments:
+            history_writer.write(judgment)
+
+def rehydrate(lines, decode = json.loads, fields: list = None, source: str = ""):
+    """
+    judgments from the lines of a JSONL, normalized (see HistoryWriter) or with the history in every record, compact or full entries.
+    chain lines are decoded on the first record referring to them, and then shared.
+    entries are returned in the full form, the URLs of compact entries are derived.
+    args:
+        lines: iterable of str, lines of the JSONL.
+        decode: callable, str to object, e.g., json.loads.
+        fields: list, keys to keep in each record, None for all keys, chains are skipped without "history".
+        source: str, name of the file in error messages.
+    returns:
+        : generator, judgments with the history of each record rehydrated.
+    """
+    keep_history = fields is None or "history" in fields
+    dict_line = {} # chain id to its line, not decoded yet
+    dict_history = {} # chain id to History
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = PATTERN_CHAIN.match(line)
+        if match:
+            if keep_history:
+                dict_line[int(match.group(1))] = line
+            continue
+        judgment = decode(line)
+        if fields is not None:
+            judgment = {key: judgment[key] for key in fields if key in judgment}
+        chain = judgment.get("history") if keep_history else None
+        if isinstance(chain, int):
+            if chain not in dict_history:
+                if chain not in dict_line:
+                    raise ValueError(f"History chain {chain} is referred before its definition in {source}")
+                history = decode(dict_line.pop(chain))["history"]
+                dict_history[chain] = History([expand_entry(entry) for entry in history], chain)
+            judgment["history"] = dict_history[chain]
+        elif isinstance(chain, list) and chain:
+            judgment["history"] = [expand_entry(entry) for entry in chain]
+        yield judgment
+
+def export_full(input_path: str, output_path: str):
+    """
+    write a history JSONL in the full form, every record with its history and the URLs of each entry, for tools reading the original layout.
+    """
+    with open_text(input_path) as f:
+        write_history(rehydrate(f, source = input_path), output_path, normalize = False, compact = False)
@@ -0,0 +1,75 @@
+import os
+import sys
+from functools import lru_cache
+
+def jid_of_file(file_name: str) -> str:
+    """
+    JID of a judgment file name, e.g., "TPHV,87,勞上,32,19990209.json" to "TPHV,87,勞上,32,19990209", a JID is kept as is.
+    """
+    return file_name.split(".", 1)[0]
+
+class JID:
+    """
+    JID parsed once, e.g., "TPHV,87,勞上,32,19990209,1":
+        court: "TPHV", court code, interned, empty if the text is not a JID (e.g., a history entry without JID).
+        year: 87, ROC year, -1 if it is not a number.
+        case: "勞上", case type, interned.
+        number: "32".
+        date: "19990209".
+        version: "1", "0" if the JID has no version.
+    equal to and hashed as its text, so a JID and its str are interchangeable as keys of a dict or set.
+    sort_key is (date, version), the chronological order of the history of appeal.py.
+    usage:
+        jid = parse_jid("TPHV,87,勞上,32,19990209,1")
+        jid.without_version # "TPHV,87,勞上,32,19990209"
+    """
+    __slots__ = ("text", "court", "year", "case", "number", "date", "version", "without_version", "sort_key", "_hash")
+
+    def __init__(self, text: str):
+        fields = text.split(",")
+        fields += [""] * (5 - len(fields))
+        code = fields[0]
+        self.text = text
+        self.court = sys.intern(code) if code.isascii() and code.isalpha() and code.isupper() else ""
+        self.year = int(fields[1]) if fields[1].isdigit() else -1
+        self.case = sys.intern(fields[2])
+        self.number = fields[3]
+        self.date = fields[4]
+        self.version = fields[5] if len(fields) > 5 else "0"
+        self.without_version = ",".join(fields[:5]) if len(fields) > 5 else text
+        self.sort_key = (self.date, self.version)
+        self._hash = hash(text)
+
+    @classmethod
+    def from_file(cls, file_name: str):
+        """
+        JID of a judgment file, e.g., "retire/TYDV,112,勞訴,1,20230101.json".
+        """
+        return parse_jid(jid_of_file(os.path.basename(file_name)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, JID):
+            return self.text == other.text
+        if isinstance(other, str):
+            return self.text == other
+        return NotImplemented
+
+    def __lt__(self, other) -> bool:
+        return self.sort_key < other.sort_key
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"JID({self.text!r})"
+
+@lru_cache(maxsize = 1 << 20)
+def parse_jid(text: str) -> JID:
+    """
+    cached constructor of JID, the same JID is parsed once however often it is referenced.
+    pipeline scripts name their JID strings JID, so they parse with this function instead of the class.
+    """
+    return JID(text)
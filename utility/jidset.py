@@ -0,0 +1,186 @@
+import os
+import sqlite3
+
+from .reader import reader_txt
+from .setexpr import evaluate
+
+PATH_STORE = "./lists/jidset.sqlite"
+DIRS_LIST = ("./logs/", "./lists/") # directories of the JID lists written by the stages
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jid (id INTEGER PRIMARY KEY, jid TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS list (name TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER, mtime REAL, count INTEGER);
+CREATE TABLE IF NOT EXISTS member (name TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (name, id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cache (expression TEXT PRIMARY KEY, generation INTEGER NOT NULL, result TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+def name_of_path(file_path: str, root: str = ".") -> str:
+    """
+    name of a list, its path relative to root without .txt, e.g., "logs/unique/history_filtered".
+    """
+    name = os.path.relpath(file_path, root).replace(os.sep, "/")
+    return name[:-len(".txt")] if name.endswith(".txt") else name
+
+class JidSetStore:
+    """
+    persistent store of the JID lists (.txt, one JID per line) of the pipeline, in SQLite.
+    a list is named by its path, e.g., "logs/unique/history_filtered", or by its file name, e.g., "history_filtered",
+    when no other list has the same file name. a list registered with an explicit name keeps that name.
+    lists are combined with set expressions, see setexpr.evaluate, e.g.,
+        threshold ∩ history_filtered − duplicate_JID − file_list_wo_retire − file_list_wo_basis
+    results are cached by expression until a list changes, which bumps the generation of the store.
+    usage:
+        with JidSetStore() as store:
+            store.refresh()
+            list_jid = store.query("history_filtered − duplicate_JID")
+    """
+    def __init__(self, path_store: str = PATH_STORE):
+        directory = os.path.dirname(path_store)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok = True)
+        self.path_store = path_store
+        self.connection = sqlite3.connect(path_store)
+        self.connection.executescript(SCHEMA)
+        self._aliases = None
+
+    @property
+    def generation(self) -> int:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _bump(self):
+        self.connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
+        self.connection.execute("DELETE FROM cache")
+        self._aliases = None
+
+    def register(self, file_path: str, name: str = None) -> bool:
+        """
+        register a list, or update it if the file changed since it was registered.
+        args:
+            file_path: str, path to a .txt list, e.g., "./logs/unique/history_filtered.txt".
+            name: str, name of the list, default is the path, see name_of_path.
+        returns:
+            changed: bool, False if the list was registered and the file is unchanged.
+        """
+        name = name or name_of_path(file_path)
+        stat = os.stat(file_path)
+        row = self.connection.execute("SELECT path, size, mtime FROM list WHERE name = ?", (name,)).fetchone()
+        if row == (file_path, stat.st_size, stat.st_mtime):
+            return False
+        list_jid = [jid for jid in reader_txt(file_path) if jid]
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO jid (jid) VALUES (?)", ((jid,) for jid in list_jid))
+            self.connection.execute("DELETE FROM member WHERE name = ?", (name,))
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO member (name, id) SELECT ?, id FROM jid WHERE jid = ?",
+                ((name, jid) for jid in list_jid)
+            )
+            count = self.connection.execute("SELECT COUNT(*) FROM member WHERE name = ?", (name,)).fetchone()[0]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO list (name, path, size, mtime, count) VALUES (?, ?, ?, ?, ?)",
+                (name, file_path, stat.st_size, stat.st_mtime, count)
+            )
+            self._bump()
+        return True
+
+    def remove(self, name: str):
+        with self.connection:
+            self.connection.execute("DELETE FROM member WHERE name = ?", (name,))
+            self.connection.execute("DELETE FROM list WHERE name = ?", (name,))
+            self._bump()
+
+    def refresh(self, list_dir: tuple = DIRS_LIST) -> list:
+        """
+        register new and changed .txt lists under the directories, and drop lists whose file is gone.
+        returns:
+            list_name: list, names of the registered or updated lists.
+        """
+        list_name = []
+        for path_dir in list_dir:
+            if not os.path.isdir(path_dir):
+                continue
+            for root, _, files in os.walk(path_dir):
+                for file in sorted(files):
+                    if file.endswith(".txt"):
+                        file_path = os.path.join(root, file)
+                        if self.register(file_path, name_of_path(file_path)):
+                            list_name.append(name_of_path(file_path))
+        for name, file_path in self.connection.execute("SELECT name, path FROM list").fetchall():
+            if not os.path.exists(file_path):
+                self.remove(name)
+        return list_name
+
+    def aliases(self) -> dict:
+        """
+        file name to the name of the list, for file names of a single list.
+        """
+        if self._aliases is None:
+            dict_names = {}
+            for (name,) in self.connection.execute("SELECT name FROM list"):
+                dict_names.setdefault(name.rsplit("/", 1)[-1], []).append(name)
+            self._aliases = {alias: names[0] for alias, names in dict_names.items() if len(names) == 1}
+        return self._aliases
+
+    def lists(self) -> list:
+        """
+        returns:
+            list_list: list, (name, alias or None, count, path) sorted by name.
+        """
+        dict_alias = {name: alias for alias, name in self.aliases().items() if alias != name}
+        return [
+            (name, dict_alias.get(name), count, file_path)
+            for name, count, file_path in self.connection.execute("SELECT name, count, path FROM list ORDER BY name")
+        ]
+
+    def get(self, name: str) -> set:
+        """
+        args:
+            name: str, name or file name of a list.
+        returns:
+            set_jid: set, JIDs of the list.
+        """
+        row = self.connection.execute("SELECT name FROM list WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            if name not in self.aliases():
+                raise ValueError(f"Unknown JID list: {name}, a file name shared by several lists needs the path, see query.py set --list")
+            name = self.aliases()[name]
+        return {jid for (jid,) in self.connection.execute(
+            "SELECT jid.jid FROM member JOIN jid ON jid.id = member.id WHERE member.name = ?", (name,)
+        )}
+
+    def universe(self) -> set:
+        """
+        JIDs of every registered list.
+        """
+        return {jid for (jid,) in self.connection.execute("SELECT DISTINCT jid.jid FROM member JOIN jid ON jid.id = member.id")}
+
+    def query(self, expression: str) -> list:
+        """
+        evaluate a set expression of lists, complement is relative to every registered JID.
+        returns:
+            list_jid: list, sorted JIDs, cached until a list changes.
+        """
+        generation = self.generation
+        row = self.connection.execute("SELECT generation, result FROM cache WHERE expression = ?", (expression,)).fetchone()
+        if row and row[0] == generation:
+            return row[1].split("\n") if row[1] else []
+        list_jid = sorted(evaluate(expression, self.get, self.universe))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (expression, generation, result) VALUES (?, ?, ?)",
+                (expression, generation, "\n".join(list_jid))
+            )
+        return list_jid
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import unicodedata
+
+from .setexpr import evaluate
+from .reader import iter_json
+
+PATTERN_SPACE = re.compile(r'\s+')
+
+def normalize_law_name(name: str) -> str:
+    """
+    normalize a law name, e.g., full-width characters and spaces.
+    args:
+        name: str, law name, e.g., "勞動基準法".
+    returns:
+        name: str, normalized law name.
+    """
+    return PATTERN_SPACE.sub('', unicodedata.normalize("NFKC", name))
+
+def normalize_article(article: str) -> str:
+    """
+    normalize an article number, e.g., "８４．２" to "84.2".
+    """
+    return PATTERN_SPACE.sub('', unicodedata.normalize("NFKC", article))
+
+def split_articles(law_no: str) -> list:
+    """
+    args:
+        law_no: str, article numbers joined by "、", e.g., "55、84.2".
+    returns:
+        list_article: list, normalized article numbers.
+    """
+    return [normalize_article(no) for no in law_no.split("、") if no.strip()]
+
+def _key(law_name: str, article: str) -> str:
+    return f"{law_name}|{article}"
+
+class LawIndex:
+    """
+    inverted index from (normalized law name, article) to JIDs, built from the related_law collected by appeal.py.
+    a term of a query is "law name:article", or "law name" for any article of the law.
+    e.g., '(勞動基準法:55 | 勞動基準法:84.2 | 勞動基準法施行細則:5) & !民法:184'
+    """
+    def __init__(self, list_jid: list = None, dict_posting: dict = None, source: dict = None):
+        self.list_jid = list_jid or [] # JID of each id
+        self.dict_posting = dict_posting or {} # "law name|article" or "law name|*" to sorted ids
+        self.source = source or {}
+
+    @classmethod
+    def build(cls, judgments, source: dict = None):
+        """
+        args:
+            judgments: iterable of dict, with keys JID and related_law.
+            source: dict, size and mtime of the source file, used to detect a stale index.
+        returns:
+            law_index: LawIndex.
+        """
+        list_jid = []
+        dict_id = {}
+        dict_posting = {}
+        for judgment in judgments:
+            jid = judgment["JID"]
+            if jid not in dict_id:
+                dict_id[jid] = len(list_jid)
+                list_jid.append(jid)
+            id_jid = dict_id[jid]
+            for law in judgment.get("related_law") or []:
+                if not law.get("law_name"):
+                    continue
+                law_name = normalize_law_name(law["law_name"])
+                list_key = [_key(law_name, "*")]
+                if law.get("law_no"):
+                    list_key.extend(_key(law_name, article) for article in split_articles(law["law_no"]))
+                for key in list_key:
+                    dict_posting.setdefault(key, set()).add(id_jid)
+        dict_posting = {key: sorted(posting) for key, posting in dict_posting.items()}
+        return cls(list_jid, dict_posting, source)
+
+    @staticmethod
+    def stat_source(path_source: str) -> dict:
+        stat = os.stat(path_source)
+        return {"path": path_source, "size": stat.st_size, "mtime": stat.st_mtime}
+
+    @classmethod
+    def load(cls, path_index: str):
+        with open(path_index, 'r', encoding = 'utf-8') as f:
+            data = json.load(f)
+        return cls(data["jids"], data["postings"], data.get("source"))
+
+    def save(self, path_index: str):
+        output_diretory = os.path.dirname(path_index)
+        if output_diretory and not os.path.exists(output_diretory):
+            os.makedirs(output_diretory)
+        with open(path_index, 'w', encoding = 'utf-8') as f:
+            json.dump({"source": self.source, "jids": self.list_jid, "postings": self.dict_posting}, f, ensure_ascii = False)
+
+    @classmethod
+    def load_or_build(cls, path_index: str, path_source: str, reader = None):
+        """
+        load the index, rebuild and save it if it is missing or its source file changed.
+        args:
+            path_index: str, path to the index json.
+            path_source: str, path to the JSONL with JID and related_law, e.g., "./appeal/all_history.jsonl".
+            reader: callable, path to iterable of judgments, default reads the JSONL lazily, see reader.iter_json.
+        returns:
+            law_index: LawIndex.
+        """
+        source = cls.stat_source(path_source)
+        if os.path.exists(path_index):
+            law_index = cls.load(path_index)
+            if law_index.source.get("size") == source["size"] and law_index.source.get("mtime") == source["mtime"]:
+                return law_index
+        judgments = reader(path_source) if reader else iter_json(path_source, fields = ["JID", "related_law"])
+        law_index = cls.build(judgments, source)
+        law_index.save(path_index)
+        return law_index
+
+    def lookup(self, law_name: str, article: str = None) -> set:
+        """
+        args:
+            law_name: str, law name.
+            article: str, article number, None or "*" for any article of the law.
+        returns:
+            set_jid: set, JIDs citing the provision.
+        """
+        article = "*" if article in (None, "*") else normalize_article(article)
+        posting = self.dict_posting.get(_key(normalize_law_name(law_name), article), [])
+        return {self.list_jid[id_jid] for id_jid in posting}
+
+    def lookup_term(self, term: str) -> set:
+        """
+        args:
+            term: str, "law name:article" or "law name".
+        """
+        law_name, _, article = term.partition(":")
+        return self.lookup(law_name, article or None)
+
+    def query(self, expression: str) -> set:
+        """
+        evaluate an AND/OR/NOT expression of provisions, NOT is relative to every indexed JID.
+        """
+        return evaluate(expression, self.lookup_term, lambda: set(self.list_jid))
+
+    def query_provisions(self, dict_provision: dict) -> set:
+        """
+        args:
+            dict_provision: dict, law name to list of articles, e.g., {"勞動基準法": ["55", "84.2"]}.
+        returns:
+            set_jid: set, JIDs citing any of the provisions.
+        """
+        set_jid = set()
+        for law_name, list_article in dict_provision.items():
+            for article in list_article:
+                set_jid |= self.lookup(law_name, article)
+        return set_jid
@@ -0,0 +1,84 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .jid import jid_of_file
+from .reader import get_decoder
+
+MAX_WORKERS = 16 # threads reading files, per-file latency of a network filesystem overlaps across them
+WINDOW = 8 # files in flight per worker, bounds the memory of read-ahead
+CHUNKSIZE = 32 # files per task of the decoding processes
+
+def list_directory(path_dir: str, list_jid: list = None, suffix: str = ".json") -> list:
+    """
+    files of a directory of per-file json, e.g., "./assets/", from one os.scandir, without opening them.
+    args:
+        path_dir: str, directory of {JID}.json files.
+        list_jid: list, only JIDs in the list are kept, default is all files.
+        suffix: str, suffix of the files, None for all files.
+    returns:
+        list_entry: list, (JID, path) sorted by file name.
+    """
+    set_jid = set(list_jid) if list_jid is not None else None
+    list_entry = []
+    with os.scandir(path_dir) as it:
+        for entry in it:
+            if suffix and not entry.name.endswith(suffix):
+                continue
+            if not entry.is_file():
+                continue
+            jid = jid_of_file(entry.name)
+            if set_jid is not None and jid not in set_jid:
+                continue
+            list_entry.append((entry.name, jid, entry.path))
+    list_entry.sort()
+    return [(jid, path) for _, jid, path in list_entry]
+
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def _read_decode(file_path: str, decode):
+    return decode(_read_bytes(file_path))
+
+def load_files(list_path: list, max_workers: int = MAX_WORKERS, processes: int = 0, decoder = None):
+    """
+    yield the json documents of files in the order of list_path, read by a thread pool.
+    with processes = 0 the threads also decode, otherwise the bytes are decoded by a process pool of that size,
+    which only pays off for large documents, the bytes and documents are pickled between processes.
+    args:
+        list_path: list, paths of json files.
+        max_workers: int, threads reading files.
+        processes: int, processes decoding the files, 0 to decode in the threads.
+        decoder: None, "json", "orjson" or a picklable callable, see reader.get_decoder.
+    yields:
+        data: dict, the document of each file.
+    """
+    decode = get_decoder(decoder)
+    window = max_workers * WINDOW
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        if processes:
+            with ProcessPoolExecutor(max_workers = processes) as executor_decode:
+                for start in range(0, len(list_path), window):
+                    list_bytes = list(executor.map(_read_bytes, list_path[start:start + window]))
+                    yield from executor_decode.map(decode, list_bytes, chunksize = CHUNKSIZE)
+            return
+        queue = deque()
+        for file_path in list_path:
+            queue.append(executor.submit(_read_decode, file_path, decode))
+            if len(queue) >= window:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+
+def load_directory(path_dir: str, list_jid: list = None, max_workers: int = MAX_WORKERS, processes: int = 0, decoder = None):
+    """
+    yield the json documents of a directory of per-file json in the order of the file names, see list_directory and load_files.
+    args:
+        path_dir: str, directory of {JID}.json files, e.g., "./assets/".
+        list_jid: list, only JIDs in the list are read, the other files are never opened.
+    yields:
+        data: dict, the document of each file.
+    """
+    list_entry = list_directory(path_dir, list_jid)
+    yield from load_files([path for _, path in list_entry], max_workers = max_workers, processes = processes, decoder = decoder)
@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import mmap
+
+from .codec import codec_of
+from .reader import get_decoder
+from .history import History, expand_entry
+
+PATTERN_JID = re.compile(rb'\{"JID": "((?:[^"\\]|\\.)*)"')
+PATTERN_CHAIN = re.compile(rb'\{"chain": (\d+), ')
+
+class JsonlIndex:
+    """
+    sidecar offset index of a JSONL, {path}.idx.json, from JID to the (byte offset, length) of its lines,
+    chain lines of a normalized file (see history.py) are keyed "@{id}".
+    lookups decode only the requested lines from a memory map of the file.
+    the index is rebuilt when the size or mtime of the file changes, compressed files are not indexed.
+    usage:
+        index = JsonlIndex.load_or_build("./links/link_filtered.jsonl")
+        list_record = index.get("TPHV,87,勞上,32,19990209")
+    """
+    def __init__(self, file_path: str, dict_offset: dict, source: dict = None):
+        self.file_path = file_path
+        self.dict_offset = dict_offset # JID or "@{chain id}" to list of [offset, length]
+        self.source = source or {}
+        self.dict_chain = {} # chain id to History, decoded once
+        self._file = None
+        self._mmap = None
+
+    @staticmethod
+    def path_index(file_path: str) -> str:
+        return f"{file_path}.idx.json"
+
+    @staticmethod
+    def stat_source(file_path: str) -> dict:
+        stat = os.stat(file_path)
+        return {"path": file_path, "size": stat.st_size, "mtime": stat.st_mtime}
+
+    @classmethod
+    def build(cls, file_path: str):
+        """
+        scan the lines of the file, the JID is read from the start of each line, lines without it are decoded.
+        args:
+            file_path: str, path to an uncompressed JSONL.
+        returns:
+            index: JsonlIndex.
+        """
+        if codec_of(file_path):
+            raise ValueError(f"Offset index needs an uncompressed file: {file_path}")
+        source = cls.stat_source(file_path)
+        dict_offset = {}
+        offset = 0
+        with open(file_path, 'rb') as f:
+            for line in f:
+                length = len(line)
+                match = PATTERN_JID.match(line)
+                if match:
+                    key = json.loads(b'"' + match.group(1) + b'"')
+                else:
+                    match = PATTERN_CHAIN.match(line)
+                    if match:
+                        key = f"@{int(match.group(1))}"
+                    elif line.strip():
+                        record = json.loads(line)
+                        key = record.get("JID") if isinstance(record, dict) else None
+                    else:
+                        key = None
+                if key is not None:
+                    dict_offset.setdefault(key, []).append([offset, length])
+                offset += length
+        return cls(file_path, dict_offset, source)
+
+    @classmethod
+    def load(cls, file_path: str):
+        with open(cls.path_index(file_path), 'r', encoding = 'utf-8') as f:
+            data = json.load(f)
+        return cls(file_path, data["offsets"], data.get("source"))
+
+    def save(self):
+        with open(self.path_index(self.file_path), 'w', encoding = 'utf-8') as f:
+            json.dump({"source": self.source, "offsets": self.dict_offset}, f, ensure_ascii = False)
+
+    @classmethod
+    def load_or_build(cls, file_path: str):
+        """
+        load the sidecar index, rebuild and save it if it is missing or the file changed.
+        """
+        source = cls.stat_source(file_path)
+        if os.path.exists(cls.path_index(file_path)):
+            index = cls.load(file_path)
+            if index.source.get("size") == source["size"] and index.source.get("mtime") == source["mtime"]:
+                return index
+        index = cls.build(file_path)
+        index.save()
+        return index
+
+    def _buffer(self):
+        if self._mmap is None: # only called for offsets of the index, so the file is not empty
+            self._file = open(self.file_path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+        return self._mmap
+
+    def _decode(self, offset: int, length: int, decode):
+        return decode(self._buffer()[offset:offset + length])
+
+    def _chain(self, chain: int, decode) -> History:
+        if chain not in self.dict_chain:
+            list_offset = self.dict_offset.get(f"@{chain}")
+            if not list_offset:
+                raise ValueError(f"History chain {chain} is not in {self.file_path}")
+            history = self._decode(*list_offset[0], decode)["history"]
+            self.dict_chain[chain] = History([expand_entry(entry) for entry in history], chain)
+        return self.dict_chain[chain]
+
+    def __contains__(self, jid: str) -> bool:
+        return jid in self.dict_offset and not jid.startswith("@")
+
+    def keys(self) -> list:
+        return [key for key in self.dict_offset if not key.startswith("@")]
+
+    def get(self, jid: str, decoder = None) -> list:
+        """
+        args:
+            jid: str, JID of the records.
+            decoder: None, "json", "orjson" or callable, see reader.get_decoder.
+        returns:
+            list_record: list, records of the JID in file order with the history rehydrated, empty if the JID is not in the file.
+        """
+        if jid not in self:
+            return []
+        decode = get_decoder(decoder)
+        list_record = []
+        for offset, length in self.dict_offset[jid]:
+            record = self._decode(offset, length, decode)
+            history = record.get("history")
+            if isinstance(history, int):
+                record["history"] = self._chain(history, decode)
+            elif isinstance(history, list) and history:
+                record["history"] = [expand_entry(entry) for entry in history]
+            list_record.append(record)
+        return list_record
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
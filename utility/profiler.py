@@ -0,0 +1,143 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+def _percentile(values: list, q: float) -> float:
+    """
+    nearest-rank percentile of sorted values.
+    args:
+        values: list, sorted values.
+        q: float, percentile in [0, 100].
+    returns:
+        value: float, 0 if values is empty.
+    """
+    if not values:
+        return 0
+    rank = max(int(round(q / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+def _describe(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": values[-1] if values else 0,
+        "total": sum(values)
+    }
+
+class Profiler:
+    """
+    opt-in per-stage profiler for the extraction, records wall time and allocated bytes of each stage per document.
+    usage:
+        profiler.document(jid, len(text))
+        with profiler.stage("crop_judgment"):
+            ...
+        profiler.annotate(segment_count = 10)
+        report = profiler.report(top = 20)
+    """
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.list_record = []
+        self.list_stage = [] # stage names in first-seen order
+        self._started_tracing = False
+
+    def document(self, jid: str, text_length: int):
+        """
+        start the record of a document, following stages are counted to it.
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.list_record.append({
+            "JID": jid,
+            "text_length": text_length,
+            "segment_count": 0,
+            "seconds": 0.0,
+            "stages": {}
+        })
+
+    def annotate(self, **kwargs):
+        """
+        set extra fields of the current document, e.g., segment_count.
+        """
+        if self.list_record:
+            self.list_record[-1].update(kwargs)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        measure wall time and peak allocated bytes of a stage of the current document.
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - time_start
+            allocated = tracemalloc.get_traced_memory()[1] - memory_start if self.trace_memory else 0
+            if name not in self.list_stage:
+                self.list_stage.append(name)
+            if self.list_record:
+                record = self.list_record[-1]
+                seconds_stage, allocated_stage = record["stages"].get(name, (0.0, 0))
+                record["stages"][name] = (seconds_stage + seconds, allocated_stage + allocated)
+                record["seconds"] += seconds
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self, top: int = 20) -> dict:
+        """
+        aggregate the records into percentiles per stage and the slowest documents.
+        args:
+            top: int, number of slowest documents in the report.
+        returns:
+            report: dict, keys: documents, stages, slowest.
+        """
+        dict_stage = {}
+        for name in self.list_stage:
+            list_seconds = [record["stages"][name][0] for record in self.list_record if name in record["stages"]]
+            list_bytes = [record["stages"][name][1] for record in self.list_record if name in record["stages"]]
+            dict_stage[name] = {
+                "seconds": _describe(list_seconds),
+                "bytes": _describe(list_bytes)
+            }
+        list_slowest = sorted(self.list_record, key = lambda x: x["seconds"], reverse = True)[:top]
+        return {
+            "documents": len(self.list_record),
+            "stages": dict_stage,
+            "slowest": [
+                {
+                    "JID": record["JID"],
+                    "seconds": record["seconds"],
+                    "text_length": record["text_length"],
+                    "segment_count": record["segment_count"],
+                    "stages": {name: seconds for name, (seconds, _) in record["stages"].items()}
+                }
+                for record in list_slowest
+            ]
+        }
+
+    def format_report(self, top: int = 20) -> list:
+        """
+        returns:
+            list_lines: list, human readable lines of the report.
+        """
+        report = self.report(top)
+        list_lines = [f"documents: {report['documents']}"]
+        list_lines.append(f"{'stage':<40}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}{'p90 KiB':>10}")
+        for name, stats in report["stages"].items():
+            seconds = stats["seconds"]
+            list_lines.append(
+                f"{name:<40}{seconds['p50'] * 1000:>10.2f}{seconds['p90'] * 1000:>10.2f}{seconds['p99'] * 1000:>10.2f}"
+                f"{seconds['max'] * 1000:>10.2f}{seconds['total']:>10.2f}{stats['bytes']['p90'] / 1024:>10.1f}"
+            )
+        list_lines.append(f"top {top} slowest documents:")
+        for record in report["slowest"]:
+            list_lines.append(f"{record['JID']}: {record['seconds'] * 1000:.2f} ms, text_length = {record['text_length']}, segment_count = {record['segment_count']}")
+        return list_lines
@@ -1,36 +1,126 @@
 import json
+import itertools
+from functools import lru_cache
+
+from .jid import jid_of_file
+from .codec import open_text, strip_codec
+from .history import rehydrate
+
+@lru_cache(maxsize = None)
+def _orjson():
+    """
+    orjson module, None if it is not installed, imported on first use to keep the startup of the scripts short.
+    """
+    try:
+        import orjson # optional, faster decoding of large JSONL files
+    except ImportError:
+        return None
+    return orjson
 
 def reader_txt(file_path: str) -> list:
     """
-    read a text file and return a list of lines.
+    read a text file and return a list of lines, .gz and .xz are decompressed in a stream.
     args:
         file_path: str, Path to the text file.
     returns:
         list_lines: list, List of lines in the file.
     """
     list_lines = []
-    with open(file_path, 'r', encoding = 'utf-8') as f:
+    with open_text(file_path) as f:
         for line in f:
             file_name = line.strip()
-            jid = file_name if len(file_name.split(".")) == 1 else file_name.split(".")[0]
-            list_lines.append(jid)
+            list_lines.append(jid_of_file(file_name))
     return list_lines
 
-def reader_json(file_path: str) -> list:
+def get_decoder(decoder = None):
+    """
+    args:
+        decoder: None for orjson if it is installed else json, "json", "orjson", or a callable from str to object.
+    returns:
+        decode: callable, str to object.
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        decoder = "orjson" if _orjson() else "json"
+    if decoder == "orjson":
+        if _orjson() is None:
+            raise ValueError("Decoder orjson is not installed, install it or use decoder = 'json'")
+        return _orjson().loads
+    if decoder == "json":
+        return json.loads
+    raise ValueError(f"Unknown decoder: {decoder}")
+
+def _read(f, decode, fields: list, file_path: str) -> tuple:
+    """
+    detect the layout from the content: a JSONL has a complete value on each line, anything else is one JSON document.
+    a file with a single line is a JSONL only if it is named .jsonl, e.g., a judgment .json written on one line.
+    a file that is neither raises ValueError, with the line of the error if its first line decodes (a corrupt JSONL).
+    returns:
+        : tuple, ("lines", generator of records) or ("document", decoded document).
+    """
+    list_head = []
+    list_value = []
+    error_line = None
+    for line in f:
+        list_head.append(line)
+        if not line.strip():
+            continue
+        try:
+            list_value.append(decode(line))
+        except ValueError as e:
+            error_line = e
+            break
+        if len(list_value) == 2:
+            break
+    if len(list_value) == 2 or (error_line is None and (not list_value or strip_codec(file_path).endswith('.jsonl'))):
+        return "lines", rehydrate(itertools.chain(list_head, f), decode, fields, file_path)
+    try:
+        return "document", decode("".join(list_head) + f.read())
+    except ValueError as e:
+        if list_value:
+            raise ValueError(f"Invalid JSON on line {len(list_head)} of {file_path}: {error_line}") from error_line
+        raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+
+def _project(record, fields: list):
+    if fields is None or not isinstance(record, dict):
+        return record
+    return {key: record[key] for key in fields if key in record}
+
+def iter_json(file_path: str, fields: list = None, decoder = None):
+    """
+    read a JSONL or JSON file lazily, memory depends on the size of a record instead of the file.
+    history chains of a normalized JSONL are rehydrated (see history.py), a JSON array yields its items.
+    args:
+        file_path: str, path to the file, the layout is detected from the content, .gz and .xz are decompressed in a stream.
+        fields: list, keys to keep in each record, e.g., ["JID", "history"], None for all keys.
+        decoder: None, "json", "orjson" or callable, see get_decoder.
+    returns:
+        : generator, records of the file.
+    """
+    decode = get_decoder(decoder)
+    with open_text(file_path) as f:
+        layout, data = _read(f, decode, fields, file_path)
+        if layout == "lines":
+            yield from data
+        else:
+            for record in (data if isinstance(data, list) else [data]):
+                yield _project(record, fields)
+
+def reader_json(file_path: str, fields: list = None, decoder = None) -> list:
     """
-    Reads a JSONL file and returns a list of dictionaries.
+    Reads a JSONL file and returns a list of dictionaries, history chains of a normalized file are rehydrated (see history.py).
+    a JSON document is returned as it is, e.g., a judgment .json.
     args:
         file_path: str, path to the JSONL file.
+        fields: list, keys to keep in each record, None for all keys.
+        decoder: None, "json", "orjson" or callable, see get_decoder.
     returns:
         data: list, a list of dictionaries parsed from the JSONL file.
     """
-    data = None
-    if file_path.endswith('.jsonl'):
-        data = []
-        with open(file_path, 'r', encoding = 'utf-8') as f:
-            for line in f:
-                data.append(json.loads(line.strip()))
-    elif file_path.endswith('.json'):
-        with open(file_path, 'r', encoding = 'utf-8') as f:
-            data = json.load(f)
-    return data
\ No newline at end of file
+    decode = get_decoder(decoder)
+    with open_text(file_path) as f:
+        layout, data = _read(f, decode, fields, file_path)
+        if layout == "lines":
+            return list(data)
+        return [_project(record, fields) for record in data] if isinstance(data, list) else _project(data, fields)
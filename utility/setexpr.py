@@ -0,0 +1,105 @@
+import re
+
+PATTERN_TOKEN = re.compile(r'\s*(?:(?P<op>[&|!()∩∪−¬\\-])|"(?P<quoted>[^"]*)"|(?P<name>[^\s&|!()∩∪−¬\\\-"]+))')
+
+KEYWORDS = {"AND": "&", "OR": "|", "NOT": "!"}
+OPERATORS = {"∩": "&", "∪": "|", "¬": "!", "−": "-", "\\": "-"}
+
+def tokenize(expression: str) -> list:
+    """
+    split a set expression into tokens.
+    args:
+        expression: str, e.g., 'threshold ∩ history_filtered − duplicate_JID'.
+    returns:
+        list_token: list, tuples of ("op", one of & | ! - ( )) or ("name", name).
+    """
+    list_token = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = PATTERN_TOKEN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid set expression at position {pos}: {expression}")
+        pos = match.end()
+        if match.group("op"):
+            op = match.group("op")
+            list_token.append(("op", OPERATORS.get(op, op)))
+        elif match.group("quoted") is not None:
+            list_token.append(("name", match.group("quoted")))
+        else:
+            name = match.group("name")
+            if name in KEYWORDS:
+                list_token.append(("op", KEYWORDS[name]))
+            else:
+                list_token.append(("name", name))
+    return list_token
+
+def evaluate(expression: str, resolve, universe = None) -> set:
+    """
+    evaluate a set expression.
+    grammar, from lowest to highest precedence:
+        union and difference: a | b, a ∪ b, a OR b, a - b, a − b
+        intersection: a & b, a ∩ b, a AND b
+        complement: !a, ¬a, NOT a (needs universe)
+        parentheses and names, names with spaces or operators are quoted: "a b"
+    args:
+        expression: str, set expression.
+        resolve: callable, name to set.
+        universe: set or callable returning set, used by complement.
+    returns:
+        result: set.
+    """
+    list_token = tokenize(expression)
+    position = [0]
+
+    def peek():
+        return list_token[position[0]] if position[0] < len(list_token) else (None, None)
+
+    def take():
+        token = peek()
+        position[0] += 1
+        return token
+
+    def parse_union():
+        result = parse_intersection()
+        while peek() in (("op", "|"), ("op", "-")):
+            _, op = take()
+            right = parse_intersection()
+            result = result | right if op == "|" else result - right
+        return result
+
+    def parse_intersection():
+        result = parse_unary()
+        while peek() == ("op", "&"):
+            take()
+            result = result & parse_unary()
+        return result
+
+    def parse_unary():
+        if peek() == ("op", "!"):
+            take()
+            if universe is None:
+                raise ValueError(f"Complement needs a universe: {expression}")
+            set_universe = universe() if callable(universe) else universe
+            return set(set_universe) - parse_unary()
+        return parse_atom()
+
+    def parse_atom():
+        kind, value = take()
+        if (kind, value) == ("op", "("):
+            result = parse_union()
+            if take() != ("op", ")"):
+                raise ValueError(f"Missing ')' in set expression: {expression}")
+            return result
+        if kind == "name":
+            return set(resolve(value))
+        if kind is None:
+            raise ValueError(f"Unexpected end of set expression: {expression}")
+        raise ValueError(f"Unexpected token {value!r} in set expression: {expression}")
+
+    if not list_token:
+        raise ValueError("Empty set expression")
+    result = parse_union()
+    if position[0] != len(list_token):
+        raise ValueError(f"Unexpected token {peek()[1]!r} in set expression: {expression}")
+    return result
@@ -1,30 +1,118 @@
 import os
 import json
 
-def write_output(list_output: list, output_path: str):
+from .codec import BUFFER_SIZE, open_text, strip_codec
+
+POLICIES = ("skip", "overwrite", "error")
+
+class Writer:
+    """
+    buffered writer committed atomically: the lines go to a temporary file next to output_path, which replaces
+    output_path on close, and is removed if the block raises, so an interrupted run leaves no truncated file behind.
+    an existing output_path is handled by policy:
+        skip: keep it and write nothing, the behaviour of write_output.
+        overwrite: replace it on commit.
+        error: raise ValueError.
+    with append = True the lines are appended to output_path in place, for streaming producers, policy is not used.
+    items of a .jsonl file are serialized with json.dumps, other items are written as they are, one per line.
+    a path ending with .gz or .xz is compressed in a stream, e.g., "./unique/unique_history.jsonl.gz", see codec.open_text.
+    usage:
+        with Writer(output_path, policy = "overwrite") as writer:
+            for item in items:
+                writer.write(item)
+    """
+    def __init__(self, output_path: str, policy: str = "skip", append: bool = False, buffer_size: int = BUFFER_SIZE):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}, expected one of {POLICIES}")
+        self.output_path = output_path
+        self.policy = policy
+        self.append = append
+        self.buffer_size = buffer_size
+        self.jsonl = strip_codec(output_path).endswith('.jsonl')
+        self.file = None
+        self.path_temp = None
+        self.skipped = False
+
+    def open(self):
+        output_diretory = os.path.dirname(self.output_path)
+        if output_diretory and not os.path.exists(output_diretory):
+            os.makedirs(output_diretory, exist_ok = True)
+        if self.append:
+            self.file = open_text(self.output_path, 'a', buffer_size = self.buffer_size)
+            return self
+        if os.path.exists(self.output_path):
+            if self.policy == "skip":
+                print(f"Output file {self.output_path} already exists. No changes made.")
+                self.skipped = True
+                return self
+            if self.policy == "error":
+                raise ValueError(f"Output file {self.output_path} already exists.")
+        self.path_temp = f"{self.output_path}.{os.getpid()}.tmp"
+        self.file = open_text(self.path_temp, 'w', codec_path = self.output_path, buffer_size = self.buffer_size)
+        return self
+
+    def write(self, item):
+        """
+        write one item as a line, nothing is written if the file was skipped.
+        """
+        if self.file is not None:
+            self.file.write((json.dumps(item, ensure_ascii = False) if self.jsonl else item) + "\n")
+
+    def write_all(self, items):
+        for item in items:
+            self.write(item)
+
+    def write_text(self, text: str):
+        """
+        write text as it is, without a line break.
+        """
+        if self.file is not None:
+            self.file.write(text)
+
+    def close(self):
+        """
+        flush and commit, the temporary file replaces output_path.
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if self.path_temp:
+            os.replace(self.path_temp, self.output_path)
+            self.path_temp = None
+
+    def abort(self):
+        """
+        discard what was written, output_path is left as it was, except for lines already appended in append mode.
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if self.path_temp:
+            os.remove(self.path_temp)
+            self.path_temp = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+def write_output(list_output: list, output_path: str, policy: str = "skip"):
+    """
+    write output to file, one item per line, see Writer for the policy of an existing file.
+    """
+    with Writer(output_path, policy) as writer:
+        writer.write_all(list_output)
+
+def write_json(dict_content, output_path: str, policy: str = "skip"):
     """
-    write output to file
+    write a JSON document, see Writer for the policy of an existing file.
     """
-    output_diretory = os.path.dirname(output_path)
-    if not os.path.exists(output_diretory):
-        os.makedirs(output_diretory)
-    if not os.path.exists(output_path):
-        with open(output_path, 'w', encoding = 'utf-8') as f:
-            for item in list_output:
-                if output_path.endswith('.jsonl'):
-                    text = json.dumps(item, ensure_ascii = False)
-                else:
-                    text = item
-                f.write(text + "\n")
-    else:
-        print(f"Output file {output_path} already exists. No changes made.")
-
-def write_json(dict_content, output_path: str):
-    output_diretory = os.path.dirname(output_path)
-    if not os.path.exists(output_diretory):
-        os.makedirs(output_diretory)
-    if not os.path.exists(output_path):
-        with open(output_path, 'w', encoding = 'utf-8') as f:
-            json.dump(dict_content, f, indent = 4, ensure_ascii = False)
-    else:
-        print(f"JSON file {output_path} already exists. No changes made.")
\ No newline at end of file
+    with Writer(output_path, policy) as writer:
+        writer.write_text(json.dumps(dict_content, indent = 4, ensure_ascii = False))